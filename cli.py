@@ -0,0 +1,188 @@
+##ALERTRAN_SGD - ejecución por línea de comandos (sin ventanas)
+##Mismo motor que la aplicación: ProcesoThread, bitácora, archivo de errores y log.
+##
+##Ejemplo:
+##  ALERTRAN_PASSWORD=... python cli.py --usuario operador --excel guias.xlsx \
+##      --ciudad "BOG BOGOTA" --tipo 22 --ampliacion "Texto" --navegadores 4
+##
+##Como instancia de un lote cargado con coordinador.py (las guías y parámetros salen del almacén):
+##  ALERTRAN_PASSWORD=... python cli.py --usuario operador --lote 3f9a1c2b7d10 \
+##      --almacen //servidor/compartida/trabajos.sqlite3 --navegadores 4
+
+import argparse
+import getpass
+import multiprocessing
+import os
+import signal
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from PySide6.QtCore import QCoreApplication
+
+from config.constants import CIUDADES, TIPOS_INCIDENCIA, ERROR_MESSAGES
+from config.settings import MAX_NAVEGADORES_AUTO, RUTA_ALMACEN
+from utils.almacen_trabajos import AlmacenTrabajos
+from utils.bitacora import Bitacora
+from utils.file_utils import FileUtils
+from workers.proceso_thread import ProcesoThread
+
+
+def resolver_ciudad(valor):
+    """Acepta el nombre completo o su código (p. ej. "BOG")"""
+    coincidencias = [c for c in CIUDADES if c == valor or c.split(" ")[0] == valor.upper()]
+    if not coincidencias:
+        raise argparse.ArgumentTypeError(f"Regional desconocida: {valor}")
+    return coincidencias[0]
+
+
+def leer_cuentas(ruta):
+    """Archivo con una cuenta adicional por línea: usuario:contraseña"""
+    cuentas = []
+    for linea in Path(ruta).read_text(encoding="utf-8").splitlines():
+        linea = linea.strip()
+        if linea and not linea.startswith("#"):
+            usuario, _, password = linea.partition(":")
+            cuentas.append((usuario.strip(), password.strip()))
+    return cuentas
+
+
+def entero_positivo(valor):
+    numero = int(valor)
+    if numero < 1:
+        raise argparse.ArgumentTypeError(f"debe ser al menos 1: {valor}")
+    return numero
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(description="ALERTRAN SGD - creación masiva de desviaciones sin interfaz")
+    parser.add_argument("--excel", type=Path, help="Archivo Excel con las guías (columna A)")
+    parser.add_argument("--ciudad", type=resolver_ciudad, help="Regional (nombre o código)")
+    parser.add_argument("--tipo", choices=TIPOS_INCIDENCIA, help="Tipo de desviación")
+    parser.add_argument("--ampliacion", help="Texto de ampliación")
+    parser.add_argument("--lote", help="Procesar un lote del almacén compartido (sustituye a --excel y parámetros)")
+    parser.add_argument("--almacen", type=Path, default=RUTA_ALMACEN,
+                        help="Almacén de trabajos compartido (o variable ALERTRAN_ALMACEN)")
+    parser.add_argument("--navegadores", type=entero_positivo, default=1, help="Número de navegadores")
+    parser.add_argument("--procesos", type=entero_positivo, default=1, help="Procesos entre los que repartir los navegadores")
+    parser.add_argument("--usuario", default=os.environ.get("ALERTRAN_USUARIO"),
+                        help="Usuario ALERTRAN (o variable ALERTRAN_USUARIO)")
+    parser.add_argument("--cuentas", help="Archivo de cuentas adicionales (usuario:contraseña por línea)")
+    parser.add_argument("--salida", type=Path, help="Carpeta del archivo de errores y del log (por defecto Descargas)")
+    parser.add_argument("--reanudar", action="store_true", help="Omitir las guías ya terminadas según la bitácora")
+    parser.add_argument("--auto", action="store_true", help=f"Control automático de navegadores (hasta {MAX_NAVEGADORES_AUTO})")
+    parser.add_argument("--preseleccion-ent", action="store_true", help="Pre-filtrar guías ENT")
+    parser.add_argument("--peticiones-directas", action="store_true", help="Crear con peticiones directas")
+    parser.add_argument("--trazas", action="store_true", help="Guardar trazas de guías con error o lentas")
+    parser.add_argument("--con-ventanas", action="store_true", help="Mostrar los navegadores")
+    return parser
+
+
+def main():
+    parser = crear_parser()
+    args = parser.parse_args()
+    almacen = None
+    if args.lote:
+        almacen = AlmacenTrabajos(args.almacen)
+        parametros = almacen.parametros(args.lote)
+        if parametros is None:
+            print(f"❌ {ERROR_MESSAGES['LOTE_DESCONOCIDO']}: {args.lote} ({args.almacen})", file=sys.stderr)
+            return 2
+        args.excel = Path(parametros["excel"])
+        args.ciudad, args.tipo, args.ampliacion = parametros["ciudad"], parametros["tipo"], parametros["ampliacion"]
+    else:
+        faltantes = [f"--{n}" for n in ("excel", "ciudad", "tipo", "ampliacion") if getattr(args, n) is None]
+        if faltantes:
+            parser.error(f"faltan {', '.join(faltantes)} (o indique --lote)")
+        if not args.excel.exists():
+            print(f"❌ No existe el archivo: {args.excel}", file=sys.stderr)
+            return 2
+    if not args.usuario:
+        print("❌ Indique --usuario o la variable ALERTRAN_USUARIO", file=sys.stderr)
+        return 2
+    password = os.environ.get("ALERTRAN_PASSWORD") or getpass.getpass(f"Contraseña de {args.usuario}: ")
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+
+    hilo = ProcesoThread(
+        args.usuario, password, args.ciudad, args.tipo, args.ampliacion, str(args.excel),
+        # Sin el selector de la interfaz, el límite es el del modo automático
+        min(args.navegadores, MAX_NAVEGADORES_AUTO),
+        headless=not args.con_ventanas,
+        reanudar=args.reanudar,
+        auto_navegadores=args.auto,
+        preseleccion_ent=args.preseleccion_ent,
+        peticiones_directas=args.peticiones_directas,
+        capturar_trazas=args.trazas,
+        cuentas_adicionales=leer_cuentas(args.cuentas) if args.cuentas else None,
+        num_procesos=args.procesos,
+        almacen=almacen,
+        lote=args.lote
+    )
+    carpeta = args.salida or hilo.carpeta_descargas
+    carpeta.mkdir(parents=True, exist_ok=True)
+    hilo.carpeta_descargas = carpeta
+
+    if not args.reanudar and not almacen:
+        # Igual que "DESDE CERO" en la interfaz: la bitácora previa de este archivo se descarta
+        bitacora = Bitacora(Bitacora.calcular_clave(args.excel, args.ciudad, args.tipo, args.ampliacion))
+        if bitacora.guias_terminadas():
+            print("ℹ️ La bitácora tenía resultados de este archivo; se procesará desde cero (use --reanudar)")
+        bitacora.cerrar()
+
+    # El log se escribe a medida que avanza: no crece en memoria y sobrevive a una caída
+    ruta_log = FileUtils.generar_nombre_unico(
+        carpeta, f"log_alertran_{datetime.now().strftime('%Y%m%d_%H%M%S')}", "txt"
+    )
+    archivo_log = open(ruta_log, "w", encoding="utf-8")
+    resultado = {"codigo": 0}
+
+    def log(mensaje):
+        linea = f"[{datetime.now().strftime('%H:%M:%S')}] {mensaje}"
+        if not archivo_log.closed:
+            archivo_log.write(linea + "\n")
+            archivo_log.flush()
+        print(linea, flush=True)
+
+    def error(mensaje):
+        log(f"🔴 ERROR: {mensaje}")
+        resultado["codigo"] = 1
+
+    def cancelado():
+        log("✅ Proceso cancelado por usuario")
+        resultado["codigo"] = 130
+
+    senales = hilo.senales
+    senales.log.connect(log)
+    senales.estado.connect(lambda estado: print(f"   {estado}", flush=True))
+    senales.tiempo_restante.connect(lambda texto: print(f"   {texto}", flush=True))
+    senales.error.connect(error)
+    senales.proceso_cancelado.connect(cancelado)
+    senales.archivo_errores.connect(lambda ruta: log(f"✅ Archivo de errores guardado en: {ruta}"))
+
+    def interrumpir(*_):
+        # Primer Ctrl+C: cancelación ordenada; el segundo vuelve al comportamiento por defecto
+        log("⏹ Cancelando proceso...")
+        hilo.cancelar()
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+
+    signal.signal(signal.SIGINT, interrumpir)
+
+    log(f"🚀 Iniciando con {hilo.num_navegadores} navegador(es)...")
+    log(f"👤 Usuario: {args.usuario}")
+    log(f"📁 Los archivos se guardarán en: {carpeta}")
+    log(f"📄 Log en: {ruta_log}")
+    try:
+        hilo.run()
+    finally:
+        if almacen:
+            almacen.cerrar()
+        archivo_log.close()
+
+    print(f"📄 Log guardado en: {ruta_log}")
+    return resultado["codigo"]
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
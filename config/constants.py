@@ -33,5 +33,38 @@ ERROR_MESSAGES = {
     'NO_FILE': 'No se ha seleccionado ningún archivo',
     'NO_GUIAS': 'El archivo Excel no contiene guías',
     'LOGIN_FAILED': 'Error en el inicio de sesión',
-    'NAVIGATION_FAILED': 'Error en la navegación'
-}
\ No newline at end of file
+    'NAVIGATION_FAILED': 'Error en la navegación',
+    'NO_WORKERS': 'Ningún navegador pudo iniciar sesión y navegar a 7.8',
+    'NO_PENDIENTES': 'No quedan guías pendientes para reanudar en este archivo',
+    'LOTE_DESCONOCIDO': 'El lote no existe en el almacén de trabajos',
+    'LOTE_TERMINADO': 'No quedan guías pendientes en el lote'
+}
+
+# Errores que no se solucionan reintentando (no vuelven a la cola)
+ERRORES_PERMANENTES = (
+    "Guía sin resultados",
+    "Error al volver",  # La incidencia ya se creó: reintentar la duplicaría
+)
+
+# Textos que indican que la búsqueda de la guía no devolvió resultados
+ERRORES_BUSQUEDA = ("No se encontraron", "Error", "No existe", "sin resultados")
+
+# Clasificación del resultado de "Crear": (creada, patrón) en orden de prioridad.
+# La primera coincidencia gana; la comparación ignora mayúsculas y espacios repetidos
+# y exige palabras completas (p. ej. "Error" no coincide con "Errores previos: 0").
+REGLAS_CREACION = [
+    (True, "Incidencia creada"),
+    (True, "Creado correctamente"),
+    (True, "Operación exitosa"),
+    (False, "No se pudo crear"),
+    (False, "No fue posible"),
+    (False, "Falló"),
+    (False, "Reintente"),
+    (False, "Exception"),
+    (True, "Éxito"),
+    (True, "Success"),
+    (False, "Error"),
+]
+
+# Frames cuyo texto propio no contiene mensajes del resultado (menús, filtros)
+FRAMES_IGNORADOS_MENSAJES = ("menu", "filtro")
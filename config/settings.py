@@ -2,6 +2,8 @@
 """
 Configuraciones generales de tiempo y proceso
 """
+import os
+from pathlib import Path
 
 # Tiempos de espera (en milisegundos)
 TIEMPO_ESPERA_RECUPERACION = 4000
@@ -9,10 +11,69 @@ TIEMPO_ESPERA_NAVEGACION = 3000
 TIEMPO_ESPERA_CLICK = 2000
 TIEMPO_ESPERA_CARGA = 8000
 TIEMPO_ESPERA_ENTRE_GUIAS = 2000
-TIEMPO_ESPERA_INGRESO_CODIGOS = 1500
 TIEMPO_ESPERA_VOLVER = 5000
 
+# Esperas por condición (en milisegundos)
+MARGEN_SEGURIDAD = 150          # Pausa corta tras cumplirse una condición
+TIEMPO_RED_INACTIVA = 250       # Ventana sin peticiones para considerar la red estable
+TIEMPO_MAX_RED_INACTIVA = 10000 # Máximo a esperar por la red antes de continuar
+
 # Configuración de proceso
-MAX_REINTENTOS = 3
-MAX_NAVEGADORES = 6
-URL_ALERTRAN = "https://alertran.latinlogistics.com.co/padua/inicio.do"
\ No newline at end of file
+MAX_REINTENTOS = 3              # Intentos totales por guía ante errores transitorios
+REINTENTO_BASE = 2000           # Backoff del primer reintento (ms), se duplica en cada intento
+REINTENTO_MAX = 30000           # Tope del backoff (ms); se aplica jitter de ±50%
+MAX_RECUPERACIONES = 3          # Veces que un trabajador puede recrear su navegador
+MAX_NAVEGADORES = 6             # Máximo seleccionable en modo manual (por proceso)
+NAVEGADOR_COMPARTIDO = True     # Un solo Chromium con un contexto aislado por trabajador
+NAVEGADORES_PRESELECCION = 1    # Navegadores de solo lectura del pre-filtro ENT (si se activa)
+PETICIONES_DIRECTAS = False     # Crear enviando los formularios con context.request (la interfaz queda de respaldo)
+SALTAR_VOLVER = True            # Buscar la siguiente guía sin Volver si el filtro sigue operativo
+MOTOR_EN_LOOP_UI = True         # Ejecutar el proceso en el loop qasync de la interfaz (QThread como respaldo)
+INTERVALO_SENALES_UI = 100      # ms entre lotes de log/progreso/historial hacia la interfaz (10 Hz)
+MODO_HEADLESS = False           # Ejecutar Chromium sin ventanas visibles
+BLOQUEAR_RECURSOS = True        # Descartar imágenes, fuentes y media sin interceptar (context.route desactivaría la caché HTTP)
+URLS_BLOQUEADAS = [             # Patrones de Network.setBlockedURLs; añadir "*.css" solo si el overlay no depende del CSS
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.ico", "*.svg", "*.webp", "*.bmp",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp3", "*.mp4", "*.wav", "*.avi", "*.swf",
+]
+
+# Control automático de navegadores
+MAX_NAVEGADORES_AUTO = 16       # Techo del modo automático
+VENTANA_CONCURRENCIA_AUTO = 30  # Segundos entre decisiones
+MIN_MUESTRAS_AUTO = 6           # Guías terminadas necesarias para decidir
+TOLERANCIA_LATENCIA_AUTO = 0.25 # Subida de la mediana por guía que se considera degradación
+UMBRAL_ERROR_AUTO = 0.2         # Tasa de error que obliga a retirar un navegador
+
+# Sesión compartida (storage_state en memoria, nunca en disco)
+REUTILIZAR_SESION = True        # Reutilizar el login de cada trabajador al recuperarlo y en la siguiente ejecución
+COMPARTIR_SESION = False        # Reutilizarlo además en los demás trabajadores del proceso (una sola sesión de servidor)
+DURACION_SESION = 20 * 60       # Segundos sin validar tras los que el snapshot se descarta
+
+# Bitácora para reanudar procesos interrumpidos
+RUTA_BITACORA = Path(__file__).resolve().parent.parent / "logs" / "bitacora.sqlite3"
+REANUDAR_REINTENTA_ERRORES = False  # Al reanudar, volver a encolar las guías que terminaron en ERROR
+
+# Registro de actividad (la consola muestra las últimas líneas; el log completo va a disco)
+MAX_LINEAS_LOG = 5000           # Líneas que conserva la consola de la ventana principal
+MAX_ARCHIVOS_LOG = 30           # Logs de sesión que se conservan en RUTA_LOGS
+RUTA_LOGS = Path(__file__).resolve().parent.parent / "logs" / "sesiones"
+
+# Trazas de diagnóstico (solo guías con error o lentas)
+CAPTURA_TRAZAS = False          # Mantener el tracing de Playwright abierto por trabajador
+UMBRAL_TRAZA_LENTA = 45         # Segundos por guía a partir de los que se guarda su traza
+MAX_MB_TRAZAS = 200             # Tope total de trazas escritas por proceso
+RUTA_TRAZAS = Path(__file__).resolve().parent.parent / "logs" / "trazas"
+
+# Coordinación entre instancias (almacén de trabajos SQLite en una ruta compartida)
+# ALERTRAN_ALMACEN permite indicar la ruta común a todas las instancias
+RUTA_ALMACEN = Path(os.environ.get(
+    "ALERTRAN_ALMACEN", Path(__file__).resolve().parent.parent / "logs" / "trabajos.sqlite3"
+))
+DURACION_ARRIENDO = 300         # Segundos que una instancia retiene una guía sin renovar el arriendo
+RESERVA_ARRIENDO = 2            # Guías arrendadas por navegador activo (lo que se pierde si la instancia cae)
+ESPERA_ALMACEN = 2              # Segundos entre consultas al almacén
+
+# Conexión
+# ALERTRAN_URL permite apuntar a otro servidor (p. ej. el simulador local)
+URL_ALERTRAN = os.environ.get("ALERTRAN_URL", "https://alertran.latinlogistics.com.co/padua/inicio.do")
\ No newline at end of file
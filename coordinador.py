@@ -0,0 +1,129 @@
+##ALERTRAN_SGD - coordinación de varias instancias sobre un almacén de trabajos compartido
+##El coordinador carga el Excel en el almacén; cada instancia (cli.py --lote) arrienda guías,
+##las procesa y registra su resultado. Un arriendo caducado (instancia caída) se reasigna.
+##
+##Ejemplo:
+##  python coordinador.py --almacen //servidor/compartida/trabajos.sqlite3 cargar \
+##      --excel guias.xlsx --ciudad BOG --tipo 22 --ampliacion "Texto"
+##  python coordinador.py --almacen //servidor/compartida/trabajos.sqlite3 estado --lote <lote>
+##  python coordinador.py --almacen //servidor/compartida/trabajos.sqlite3 exportar --lote <lote>
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from config.constants import TIPOS_INCIDENCIA, ERROR_MESSAGES
+from config.settings import RUTA_ALMACEN
+from utils.almacen_trabajos import AlmacenTrabajos
+from utils.bitacora import Bitacora
+from utils.file_utils import FileUtils
+from cli import resolver_ciudad
+
+
+def cargar(almacen, args):
+    if not args.excel.exists():
+        print(f"❌ No existe el archivo: {args.excel}", file=sys.stderr)
+        return 2
+    guias = FileUtils.leer_guias_excel(args.excel)
+    if not guias:
+        print(f"❌ {ERROR_MESSAGES['NO_GUIAS']}", file=sys.stderr)
+        return 2
+
+    # Mismo archivo y parámetros -> mismo lote: volver a cargar no duplica guías
+    lote = Bitacora.calcular_clave(args.excel, args.ciudad, args.tipo, args.ampliacion)[:12]
+    nuevas = almacen.cargar(
+        lote, guias, str(args.excel.resolve()), args.ciudad, args.tipo, args.ampliacion
+    )
+    unicas = len(set(guias))
+    print(f"🗂️ Lote {lote}: {nuevas} guía(s) nuevas, {unicas - nuevas} ya estaban cargadas")
+    if len(guias) > unicas:
+        print(f"♻️ {len(guias) - unicas} guía(s) duplicada(s) en el Excel - se procesan una sola vez")
+    print(f"▶️ Instancias: python cli.py --usuario <usuario> --lote {lote} --almacen {almacen.ruta}")
+    return 0
+
+
+def mostrar_estado(almacen, lote):
+    resumen = almacen.resumen(lote)
+    total = resumen["PENDIENTE"] + resumen["ASIGNADA"] + resumen["TERMINADA"]
+    print(
+        f"🗂️ Lote {lote}: {resumen['TERMINADA']}/{total} terminadas - "
+        f"{resumen['PENDIENTE']} pendientes, {resumen['ASIGNADA']} asignadas"
+    )
+    print(
+        f"   Éxitos: {resumen.get('EXITO', 0)} | ENT: {resumen.get('ENT', 0)} | "
+        f"Errores: {resumen.get('ERROR', 0)} | Advertencias: {resumen.get('ADVERTENCIA', 0)}"
+    )
+    for instancia, cantidad, restante in almacen.instancias(lote):
+        aviso = "arriendo caducado" if restante < 0 else f"arriendo vence en {int(restante)}s"
+        print(f"   🖥️ {instancia}: {cantidad} guía(s) asignadas ({aviso})")
+    return resumen
+
+
+def estado(almacen, args):
+    if almacen.parametros(args.lote) is None:
+        print(f"❌ {ERROR_MESSAGES['LOTE_DESCONOCIDO']}: {args.lote}", file=sys.stderr)
+        return 2
+    while True:
+        resumen = mostrar_estado(almacen, args.lote)
+        if not args.seguir or resumen["PENDIENTE"] + resumen["ASIGNADA"] == 0:
+            return 0
+        time.sleep(args.seguir)
+
+
+def exportar(almacen, args):
+    """Archivo de errores único con los resultados de todas las instancias"""
+    if almacen.parametros(args.lote) is None:
+        print(f"❌ {ERROR_MESSAGES['LOTE_DESCONOCIDO']}: {args.lote}", file=sys.stderr)
+        return 2
+    filas = almacen.resultados(args.lote, ("ERROR", "ADVERTENCIA"))
+    errores = [(guia, detalle) for guia, resultado, detalle in filas if resultado == "ERROR"]
+    advertencias = [(guia, detalle) for guia, resultado, detalle in filas if resultado == "ADVERTENCIA"]
+    carpeta = args.salida or FileUtils.obtener_carpeta_descargas()
+    carpeta.mkdir(parents=True, exist_ok=True)
+    ruta = FileUtils.guardar_errores_excel(errores, advertencias, carpeta)
+    if ruta:
+        print(f"✅ Archivo de errores guardado en: {ruta}")
+    else:
+        print("✅ El lote no tiene errores ni advertencias")
+    return 0
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(description="ALERTRAN SGD - coordinación de instancias por lotes")
+    parser.add_argument("--almacen", type=Path, default=RUTA_ALMACEN,
+                        help="Almacén de trabajos compartido (o variable ALERTRAN_ALMACEN)")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    p_cargar = comandos.add_parser("cargar", help="Cargar un Excel como lote")
+    p_cargar.add_argument("--excel", required=True, type=Path, help="Archivo Excel con las guías (columna A)")
+    p_cargar.add_argument("--ciudad", required=True, type=resolver_ciudad, help="Regional (nombre o código)")
+    p_cargar.add_argument("--tipo", required=True, choices=TIPOS_INCIDENCIA, help="Tipo de desviación")
+    p_cargar.add_argument("--ampliacion", required=True, help="Texto de ampliación")
+    p_cargar.set_defaults(funcion=cargar)
+
+    p_estado = comandos.add_parser("estado", help="Progreso del lote y arriendos por instancia")
+    p_estado.add_argument("--lote", required=True)
+    p_estado.add_argument("--seguir", type=float, metavar="SEG", help="Repetir cada SEG segundos hasta terminar")
+    p_estado.set_defaults(funcion=estado)
+
+    p_exportar = comandos.add_parser("exportar", help="Archivo de errores del lote completo")
+    p_exportar.add_argument("--lote", required=True)
+    p_exportar.add_argument("--salida", type=Path, help="Carpeta de destino (por defecto Descargas)")
+    p_exportar.set_defaults(funcion=exportar)
+    return parser
+
+
+def main():
+    args = crear_parser().parse_args()
+    almacen = AlmacenTrabajos(args.almacen)
+    try:
+        return args.funcion(almacen, args)
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        almacen.cerrar()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
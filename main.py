@@ -5,6 +5,7 @@
 
 import sys
 import asyncio
+import multiprocessing
 from PySide6.QtWidgets import QApplication
 import qasync
 
@@ -24,4 +25,6 @@ def main():
         sys.exit(loop.run_forever())
 
 if __name__ == "__main__":
+    # Necesario para los procesos hijos del modo multiproceso en ejecutables empaquetados
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -2,7 +2,12 @@
 """
 Señales para comunicación entre threads
 """
-from PySide6.QtCore import QObject, Signal
+import threading
+from datetime import datetime
+
+from PySide6.QtCore import QObject, Qt, QTimer, Signal
+
+from config.settings import INTERVALO_SENALES_UI
 
 class ProcesoSenales(QObject):
     """Señales para el proceso de creación de desviaciones"""
@@ -14,4 +19,59 @@ class ProcesoSenales(QObject):
     archivo_errores = Signal(str)
     guia_procesada = Signal(str, str, str, str, str)  # guia, estado, resultado, navegador, fecha
     proceso_cancelado = Signal()
-    tiempo_restante = Signal(str)
\ No newline at end of file
+    tiempo_restante = Signal(str)
+    navegadores_activos = Signal(int)
+    tiempos_pasos = Signal(object)  # lista de {paso, etiqueta, n, p50, p95, max, ...}
+
+class SenalesAgrupadas(QObject):
+    """Acumula las señales frecuentes de ProcesoSenales y las entrega a la interfaz en un
+    único lote por intervalo, en lugar de una llamada entre hilos por evento"""
+    lote = Signal(object)  # {"log": [(hora, mensaje)], "guia_procesada": [(...)], "progreso": int, ...}
+
+    ACUMULADAS = ("guia_procesada",)  # se entregan todas, en orden
+    ULTIMO_VALOR = ("progreso", "estado", "tiempo_restante", "navegadores_activos")  # solo cuenta el último
+
+    def __init__(self, senales, intervalo=INTERVALO_SENALES_UI, parent=None):
+        super().__init__(parent)
+        self.lock = threading.Lock()
+        self.pendiente = {}
+        
+        # Conexión directa: se acumula en el hilo que emite, sin pasar por la cola de eventos
+        directa = Qt.ConnectionType.DirectConnection
+        senales.log.connect(self._acumular_log, directa)
+        for nombre in self.ACUMULADAS:
+            getattr(senales, nombre).connect(
+                lambda *args, nombre=nombre: self._acumular(nombre, args), directa
+            )
+        for nombre in self.ULTIMO_VALOR:
+            getattr(senales, nombre).connect(
+                lambda valor, nombre=nombre: self._reemplazar(nombre, valor), directa
+            )
+        
+        self.temporizador = QTimer(self)
+        self.temporizador.setInterval(intervalo)
+        self.temporizador.timeout.connect(self.vaciar)
+        self.temporizador.start()
+
+    def _acumular_log(self, mensaje):
+        # La hora se toma al emitir, no al pintar el lote
+        self._acumular("log", (datetime.now().strftime("%H:%M:%S"), mensaje))
+
+    def _acumular(self, nombre, valor):
+        with self.lock:
+            self.pendiente.setdefault(nombre, []).append(valor)
+
+    def _reemplazar(self, nombre, valor):
+        with self.lock:
+            self.pendiente[nombre] = valor
+
+    def vaciar(self):
+        """Entrega lo acumulado (también antes de finalizar, para no adelantar el resumen al log)"""
+        with self.lock:
+            lote, self.pendiente = self.pendiente, {}
+        if lote:
+            self.lote.emit(lote)
+
+    def detener(self):
+        self.temporizador.stop()
+        self.vaciar()
@@ -0,0 +1,147 @@
+# simulador/benchmark.py
+"""
+Benchmark de ProcesoThread contra el simulador local: guías/min, p50/p95 por guía
+y curva de escalado de 1 a N navegadores.
+
+Uso: python -m simulador.benchmark --guias 60 --navegadores 1,2,4,6 --latencia 150
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+from openpyxl import Workbook
+
+from simulador.servidor import iniciar_servidor, argumentos_config, config_desde_argumentos
+
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def generar_excel(carpeta: Path, cantidad: int, semilla: int) -> Path:
+    """Excel de guías numéricas (mismo formato que lee FileUtils.leer_guias_excel)"""
+    generador = random.Random(semilla)
+    ruta = carpeta / f"guias_{semilla}.xlsx"
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["Guía"])
+    for _ in range(cantidad):
+        ws.append([str(generador.randint(10 ** 9, 10 ** 10 - 1))])
+    wb.save(ruta)
+    return ruta
+
+
+def estadisticas_servidor(url_inicio: str) -> dict:
+    base = url_inicio.split("/padua/")[0]
+    with urllib.request.urlopen(f"{base}/_estadisticas", timeout=5) as respuesta:
+        return json.loads(respuesta.read().decode("utf-8"))
+
+
+def ejecutar(num_navegadores, excel, carpeta, args, url, ver_log):
+    """Ejecuta un proceso completo y devuelve sus métricas"""
+    from config.constants import CIUDADES, TIPOS_INCIDENCIA
+    from utils.bitacora import Bitacora
+    from workers.proceso_thread import ProcesoThread
+    from workers.sesion import CacheSesion
+
+    CacheSesion.limpiar()
+    ciudad, tipo, ampliacion = CIUDADES[0], TIPOS_INCIDENCIA[0], "Benchmark simulador"
+    hilo = ProcesoThread(
+        "benchmark", "benchmark", ciudad, tipo, ampliacion, str(excel), num_navegadores,
+        headless=not args.con_ventanas, peticiones_directas=args.peticiones_directas
+    )
+    hilo.carpeta_descargas = carpeta
+    if ver_log:
+        hilo.senales.log.connect(lambda m: print(f"    {m}"))
+    hilo.senales.error.connect(lambda m: print(f"    ❌ {m}", file=sys.stderr))
+
+    antes = estadisticas_servidor(url)
+    inicio = time.monotonic()
+    hilo.run()
+    total = time.monotonic() - inicio
+    despues = estadisticas_servidor(url)
+
+    # La bitácora del benchmark no debe ofrecer reanudar estos archivos
+    bitacora = Bitacora(Bitacora.calcular_clave(excel, ciudad, tipo, ampliacion))
+    bitacora.descartar()
+    bitacora.cerrar()
+
+    # Guías con resultado, no intentos: un reintento no cuenta como guía terminada
+    terminadas = len(hilo.estado_guias)
+    tiempos = list(hilo.tiempos_guia.values())
+    return {
+        "navegadores": num_navegadores,
+        "guias": hilo.total_guias,
+        "segundos": round(total, 2),
+        "guias_min": round(terminadas / total * 60, 1) if total else 0.0,
+        "p50": round(percentil(tiempos, 50), 2),
+        "p95": round(percentil(tiempos, 95), 2),
+        "errores": len(hilo.guias_error),
+        "advertencias": len(hilo.guias_advertencia),
+        "ent": len(hilo.guias_ent),
+        "creadas": despues["creadas"] - antes["creadas"],
+        "duplicadas": despues["duplicadas"] - antes["duplicadas"],
+        "logins": despues["logins"] - antes["logins"],
+    }
+
+
+def imprimir(resultados):
+    print()
+    print(f"{'Nav':>4} {'Guías':>6} {'Seg':>8} {'Guías/min':>10} {'p50 s':>7} {'p95 s':>7} "
+          f"{'Err':>4} {'Adv':>4} {'ENT':>4} {'Dup':>4} {'Escala':>7}")
+    base = resultados[0]["guias_min"] if resultados else 0
+    for r in resultados:
+        escala = r["guias_min"] / base if base else 0
+        print(f"{r['navegadores']:>4} {r['guias']:>6} {r['segundos']:>8} {r['guias_min']:>10} "
+              f"{r['p50']:>7} {r['p95']:>7} {r['errores']:>4} {r['advertencias']:>4} "
+              f"{r['ent']:>4} {r['duplicadas']:>4} {escala:>6.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de ProcesoThread contra el simulador local")
+    parser.add_argument("--guias", type=int, default=40, help="Guías por ejecución")
+    parser.add_argument("--navegadores", default="1,2,4", help="Lista de navegadores a medir (p. ej. 1,2,4,8)")
+    parser.add_argument("--peticiones-directas", action="store_true", help="Usar el motor de peticiones directas")
+    parser.add_argument("--con-ventanas", action="store_true", help="Mostrar los navegadores")
+    parser.add_argument("--salida", help="Guardar los resultados en JSON")
+    parser.add_argument("--log", action="store_true", help="Mostrar el log del proceso")
+    argumentos_config(parser)
+    args = parser.parse_args()
+
+    servidor, url, _ = iniciar_servidor(config_desde_argumentos(args))
+    # Debe fijarse antes de importar config.settings desde los workers
+    os.environ["ALERTRAN_URL"] = url
+
+    from PySide6.QtCore import QCoreApplication
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+
+    print(f"Simulador en {url}")
+    resultados = []
+    try:
+        with tempfile.TemporaryDirectory() as temporal:
+            carpeta = Path(temporal)
+            for i, cantidad in enumerate(int(n) for n in args.navegadores.split(",")):
+                # Guías distintas en cada ejecución: la bitácora no las trata como reanudación
+                excel = generar_excel(carpeta, args.guias, semilla=i + 1)
+                print(f"▶️ {cantidad} navegador(es), {args.guias} guías...")
+                resultados.append(ejecutar(cantidad, excel, carpeta, args, url, args.log))
+    finally:
+        servidor.shutdown()
+
+    imprimir(resultados)
+    if args.salida:
+        Path(args.salida).write_text(json.dumps(resultados, indent=2), encoding="utf-8")
+        print(f"\nResultados guardados en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+# simulador/servidor.py
+"""
+Servidor HTTP local que reproduce el frameset de ALERTRAN usado por la automatización:
+login, menú con funcionalidad_codigo, frames filtro/resultado/contenido/solapas,
+guías ENT, popup de Crear y botón Volver. Latencia, overlay, errores y caducidad de
+sesión son configurables.
+
+Uso: python -m simulador.servidor --puerto 8765 --latencia 150
+     ALERTRAN_URL=http://127.0.0.1:8765/padua/inicio.do python main.py
+"""
+import argparse
+import html
+import json
+import random
+import secrets
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from config.constants import CIUDADES
+
+RUTA_BASE = "/padua"
+COOKIE_SESION = "JSESSIONID"
+
+
+class ConfigSimulador:
+    """Comportamiento del servidor simulado (tiempos en milisegundos)"""
+
+    def __init__(self, latencia=120, variacion=0.3, overlay=300, tasa_error=0.0,
+                 proporcion_ent=0.1, caducidad_sesion=0):
+        self.latencia = latencia                # Latencia media de cada petición .do
+        self.variacion = variacion              # Variación relativa de la latencia (±)
+        self.overlay = overlay                  # Tiempo con #capa_selector visible y campos deshabilitados
+        self.tasa_error = tasa_error            # Probabilidad de que Crear responda con error
+        self.proporcion_ent = proporcion_ent    # Fracción de guías numéricas que aparecen como ENT
+        self.caducidad_sesion = caducidad_sesion  # Segundos de vida de una sesión (0 = no caduca)
+
+
+class EstadoSimulador:
+    """Sesiones e incidencias creadas (compartido entre los hilos del servidor)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sesiones = {}
+        self.incidencias = {}
+        self.busquedas = 0
+        self.logins = 0
+
+    def estadisticas(self):
+        with self.lock:
+            return {
+                "logins": self.logins,
+                "busquedas": self.busquedas,
+                "creadas": sum(self.incidencias.values()),
+                "guias_con_incidencia": len(self.incidencias),
+                "duplicadas": sum(n - 1 for n in self.incidencias.values() if n > 1),
+            }
+
+
+def es_ent(guia, proporcion):
+    """Decisión determinista por guía para que las ejecuciones sean comparables"""
+    return zlib.crc32(guia.encode("utf-8")) % 1000 < proporcion * 1000
+
+
+# Oculta el overlay y habilita los campos tras `ms` (simula la capa de carga de ALERTRAN)
+_JS_OVERLAY = """
+<div id="capa_selector" style="position:fixed;inset:0;background:rgba(0,0,0,.2)">Cargando...</div>
+<script>
+setTimeout(function () {
+    document.getElementById("capa_selector").style.display = "none";
+    document.querySelectorAll("[data-bloqueado]").forEach(function (e) { e.disabled = false; });
+}, %d);
+</script>
+"""
+
+# Enter en los códigos valida con XHR (como ALERTRAN) en lugar de enviar el formulario
+_JS_CODIGOS = """
+<script>
+function validar(evento, campo) {
+    if (evento.key !== "Enter") return true;
+    evento.preventDefault();
+    var destino = document.getElementById("desc_" + campo.name);
+    fetch("validar.do?codigo=" + encodeURIComponent(campo.value))
+        .then(function (r) { return r.text(); })
+        .then(function (t) { destino.textContent = t; });
+    return false;
+}
+</script>
+"""
+
+_JS_VOLVER = """
+<script>
+function volver() {
+    parent.frames["resultado"].location.replace("blanco.html");
+    parent.frames["contenido"].location.replace("blanco.html");
+    parent.frames["filtro"].location.replace("filtro.do");
+}
+</script>
+"""
+
+
+def _documento(cuerpo, titulo="ALERTRAN"):
+    return f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{titulo}</title></head><body>{cuerpo}</body></html>"
+
+
+class ManejadorAlertran(BaseHTTPRequestHandler):
+    """Atiende las rutas de padua; config y estado se inyectan en la clase del servidor"""
+
+    config = None
+    estado = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, formato, *args):
+        pass
+
+    # Utilidades de respuesta
+
+    def _responder(self, cuerpo, estado=200, tipo="text/html; charset=utf-8", cabeceras=()):
+        datos = cuerpo.encode("utf-8")
+        self.send_response(estado)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(datos)))
+        self.send_header("Cache-Control", "no-store")
+        for nombre, valor in cabeceras:
+            self.send_header(nombre, valor)
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def _redirigir(self, destino, cabeceras=()):
+        self.send_response(302)
+        self.send_header("Location", destino)
+        self.send_header("Content-Length", "0")
+        for nombre, valor in cabeceras:
+            self.send_header(nombre, valor)
+        self.end_headers()
+
+    def _latencia(self):
+        base = self.config.latencia / 1000
+        time.sleep(max(0.0, random.uniform(base * (1 - self.config.variacion), base * (1 + self.config.variacion))))
+
+    def _parametros(self):
+        url = urlparse(self.path)
+        parametros = parse_qs(url.query)
+        if self.command == "POST":
+            longitud = int(self.headers.get("Content-Length") or 0)
+            cuerpo = self.rfile.read(longitud).decode("utf-8")
+            parametros.update(parse_qs(cuerpo, keep_blank_values=True))
+        return url.path, {k: v[-1] for k, v in parametros.items()}
+
+    def _sesion_valida(self):
+        cookies = self.headers.get("Cookie", "")
+        token = None
+        for parte in cookies.split(";"):
+            nombre, _, valor = parte.strip().partition("=")
+            if nombre == COOKIE_SESION:
+                token = valor
+        with self.estado.lock:
+            creada = self.estado.sesiones.get(token)
+            if creada is None:
+                return False
+            caducidad = self.config.caducidad_sesion
+            if caducidad and time.monotonic() - creada > caducidad:
+                del self.estado.sesiones[token]
+                return False
+            return True
+
+    # Rutas
+
+    def do_GET(self):
+        self._atender()
+
+    def do_POST(self):
+        self._atender()
+
+    def _atender(self):
+        ruta, parametros = self._parametros()
+        if ruta == "/_estadisticas":
+            return self._responder(json.dumps(self.estado.estadisticas()), tipo="application/json")
+        if not ruta.startswith(RUTA_BASE + "/"):
+            return self._responder(_documento("No encontrado"), 404)
+
+        nombre = ruta[len(RUTA_BASE) + 1:]
+        if nombre == "blanco.html":
+            return self._responder(_documento(""))
+
+        self._latencia()
+        if nombre == "login.do":
+            return self._login(parametros)
+        if not self._sesion_valida():
+            return self._pantalla_login()
+
+        manejador = {
+            "inicio.do": self._inicio,
+            "menu.do": self._menu,
+            "funcionalidad.do": self._funcionalidad,
+            "filtro.do": self._filtro,
+            "buscar.do": self._buscar,
+            "guia.do": self._guia,
+            "validar.do": self._validar,
+            "crear.do": self._crear,
+            "solapas.do": self._solapas,
+        }.get(nombre)
+        if manejador is None:
+            return self._responder(_documento("No encontrado"), 404)
+        manejador(parametros)
+
+    def _pantalla_login(self):
+        self._responder(_documento(f"""
+            <form method="post" action="{RUTA_BASE}/login.do" target="_top">
+                Usuario <input name="j_username" type="text">
+                Clave <input name="j_password" type="password">
+                <button type="submit">Aceptar</button>
+            </form>""", "ALERTRAN - Acceso"))
+
+    def _login(self, parametros):
+        if not parametros.get("j_username") or not parametros.get("j_password"):
+            return self._pantalla_login()
+        token = secrets.token_hex(16)
+        with self.estado.lock:
+            self.estado.sesiones[token] = time.monotonic()
+            self.estado.logins += 1
+        self._redirigir(
+            f"{RUTA_BASE}/inicio.do",
+            [("Set-Cookie", f"{COOKIE_SESION}={token}; Path={RUTA_BASE}; HttpOnly")]
+        )
+
+    def _inicio(self, parametros):
+        self._responder(
+            "<!DOCTYPE html><html><head><meta charset='utf-8'><title>ALERTRAN</title></head>"
+            f"<frameset rows='*'><frame name='menu' src='{RUTA_BASE}/menu.do'></frameset></html>"
+        )
+
+    def _menu(self, parametros):
+        ciudades = "".join(f"<li>{html.escape(c)}</li>" for c in CIUDADES)
+        self._responder(_documento(f"""
+            <table><tr><td><span>ABA BARRANQUILLA AEROPUE</span></td></tr></table>
+            <ul>{ciudades}</ul>
+            <form action="funcionalidad.do" target="principal">
+                Funcionalidad <input name="funcionalidad_codigo" type="text">
+            </form>
+            <iframe name="principal" src="blanco.html" style="width:100%;height:600px"></iframe>"""))
+
+    def _funcionalidad(self, parametros):
+        if parametros.get("funcionalidad_codigo") != "7.8":
+            return self._responder(_documento("Funcionalidad no disponible"))
+        self._responder(
+            "<!DOCTYPE html><html><head><meta charset='utf-8'></head>"
+            "<frameset rows='60,*,*,40'>"
+            "<frame name='filtro' src='filtro.do'>"
+            "<frame name='resultado' src='blanco.html'>"
+            "<frame name='contenido' src='blanco.html'>"
+            "<frame name='solapas' src='solapas.do'>"
+            "</frameset></html>"
+        )
+
+    def _filtro(self, parametros):
+        self._responder(_documento(f"""
+            <form method="post" action="buscar.do" target="resultado">
+                Envío <input name="nenvio" type="text" data-bloqueado disabled>
+            </form>{_JS_OVERLAY % self.config.overlay}"""))
+
+    def _buscar(self, parametros):
+        guia = parametros.get("nenvio", "").strip()
+        with self.estado.lock:
+            self.estado.busquedas += 1
+        if not guia.isdigit():
+            return self._responder(_documento("No se encontraron resultados"))
+        estado = "ENT" if es_ent(guia, self.config.proporcion_ent) else "TRA"
+        self._responder(_documento(f"""
+            <table>
+                <tr><th>Envío</th><th>Estado</th></tr>
+                <tr><td><a href="guia.do?nenvio={html.escape(guia)}" target="contenido">{html.escape(guia)}</a></td>
+                    <td>{estado}</td></tr>
+            </table>"""))
+
+    def _guia(self, parametros):
+        guia = html.escape(parametros.get("nenvio", ""))
+        self._responder(_documento(f"""
+            {_JS_CODIGOS}
+            <form method="post" action="crear.do" target="_blank">
+                <input type="hidden" name="nenvio" value="{guia}">
+                Tipo <input name="tipo_incidencia_codigo" type="text" data-bloqueado disabled
+                            onkeydown="return validar(event, this)"> <span id="desc_tipo_incidencia_codigo"></span>
+                Origen <input name="tipo_origen_incidencia_codigo" type="text" data-bloqueado disabled
+                              onkeydown="return validar(event, this)"> <span id="desc_tipo_origen_incidencia_codigo"></span>
+                <textarea name="ampliacion_incidencia"></textarea>
+                <input type="submit" name="accion" value="Crear">
+            </form>{_JS_OVERLAY % self.config.overlay}"""))
+
+    def _validar(self, parametros):
+        self._responder(f"Código {html.escape(parametros.get('codigo', ''))}", tipo="text/plain; charset=utf-8")
+
+    def _crear(self, parametros):
+        guia = parametros.get("nenvio", "")
+        if not guia or not parametros.get("tipo_incidencia_codigo"):
+            return self._responder(_documento("Error: faltan datos de la incidencia"))
+        if random.random() < self.config.tasa_error:
+            return self._responder(_documento("No se pudo crear la incidencia. Reintente"))
+        with self.estado.lock:
+            self.estado.incidencias[guia] = self.estado.incidencias.get(guia, 0) + 1
+        self._responder(_documento(f"Incidencia creada correctamente para {html.escape(guia)}"))
+
+    def _solapas(self, parametros):
+        self._responder(_documento(f"""
+            {_JS_VOLVER}
+            <button type="button" onclick="volver()">Volver</button>"""))
+
+
+def iniciar_servidor(config=None, host="127.0.0.1", puerto=0):
+    """Arranca el simulador en un hilo; devuelve (servidor, url de inicio, estado)"""
+    estado = EstadoSimulador()
+    manejador = type("Manejador", (ManejadorAlertran,), {
+        "config": config or ConfigSimulador(),
+        "estado": estado,
+    })
+    servidor = ThreadingHTTPServer((host, puerto), manejador)
+    servidor.daemon_threads = True
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    url = f"http://{host}:{servidor.server_address[1]}{RUTA_BASE}/inicio.do"
+    return servidor, url, estado
+
+
+def argumentos_config(parser):
+    """Opciones de línea de comandos compartidas con el benchmark"""
+    parser.add_argument("--latencia", type=int, default=120, help="Latencia media por petición (ms)")
+    parser.add_argument("--overlay", type=int, default=300, help="Duración del overlay de carga (ms)")
+    parser.add_argument("--tasa-error", type=float, default=0.0, help="Probabilidad de error al crear")
+    parser.add_argument("--ent", type=float, default=0.1, help="Fracción de guías ENT")
+    parser.add_argument("--caducidad", type=int, default=0, help="Vida de la sesión en segundos (0 = sin caducidad)")
+
+
+def config_desde_argumentos(args):
+    return ConfigSimulador(
+        latencia=args.latencia, overlay=args.overlay, tasa_error=args.tasa_error,
+        proporcion_ent=args.ent, caducidad_sesion=args.caducidad
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulador local de ALERTRAN")
+    parser.add_argument("--puerto", type=int, default=8765)
+    argumentos_config(parser)
+    args = parser.parse_args()
+
+    servidor, url, _ = iniciar_servidor(config_desde_argumentos(args), puerto=args.puerto)
+    print(f"Simulador ALERTRAN en {url}")
+    print(f"Estadísticas en http://127.0.0.1:{args.puerto}/_estadisticas")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
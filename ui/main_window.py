@@ -5,11 +5,11 @@ Ventana principal de la aplicación
 
 from PySide6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel,
-    QLineEdit, QComboBox, QPushButton, QTextEdit, QFileDialog,
+    QLineEdit, QComboBox, QPushButton, QFileDialog,
     QMessageBox, QGroupBox, QFormLayout, QSpinBox,QDialog,QApplication,
+    QCheckBox,
 )
 from PySide6.QtCore import Qt, QTimer
-from PySide6.QtGui import QTextCursor
 from datetime import datetime, timedelta
 from pathlib import Path
 import os
@@ -19,9 +19,16 @@ from ui.login_window import LoginWindow
 from ui.resumen_window import ResumenWindow
 from ui.historial_window import HistorialWindow
 from ui.widgets.progress_bar import MacProgressBar
+from ui.widgets.consola_log import ConsolaLog
+from models.signals import SenalesAgrupadas
 from workers.proceso_thread import ProcesoThread
+from workers.sesion import CacheSesion
 from config.constants import CIUDADES, TIPOS_INCIDENCIA, ERROR_MESSAGES
 from utils.file_utils import FileUtils
+from utils.bitacora import Bitacora
+from config.settings import (
+    MODO_HEADLESS, MAX_NAVEGADORES, MAX_NAVEGADORES_AUTO, PETICIONES_DIRECTAS, CAPTURA_TRAZAS
+)
 
 class VentanaPrincipal(QMainWindow):
     """Ventana principal de la aplicación"""
@@ -30,14 +37,17 @@ class VentanaPrincipal(QMainWindow):
         super().__init__()
         self.excel_path = None
         self.proceso_thread = None
+        self.agrupador = None
         self.sesion_activa = False
         self.usuario_actual = ""
         self.password_actual = ""
+        self.cuentas_adicionales = []
         self.historial_datos = []
         self.historial_window = None
         self.tiempo_inicio = None
         self.total_guias = 0
         self.guias_ent = []
+        self.tiempos_pasos = None
         self.guias_error_count = 0
         self.guias_advertencia_count = 0
         self.desviaciones_creadas = 0
@@ -87,6 +97,12 @@ class VentanaPrincipal(QMainWindow):
         self.btn_logout.setEnabled(False)
         layout.addWidget(self.btn_logout)
         
+        self.btn_cuenta = QPushButton("👥 AÑADIR CUENTA")
+        self.btn_cuenta.setToolTip("Reparte los navegadores entre varias cuentas de operador")
+        self.btn_cuenta.clicked.connect(self.agregar_cuenta)
+        self.btn_cuenta.setEnabled(False)
+        layout.addWidget(self.btn_cuenta)
+        
         self.lbl_estado_sesion = QLabel("⛔ SESIÓN NO INICIADA")
         self.lbl_estado_sesion.setAlignment(Qt.AlignmentFlag.AlignCenter)
         layout.addWidget(self.lbl_estado_sesion)
@@ -117,12 +133,46 @@ class VentanaPrincipal(QMainWindow):
         nav_layout = QHBoxLayout()
         self.num_navegadores_spin = QSpinBox()
         self.num_navegadores_spin.setMinimum(1)
-        self.num_navegadores_spin.setMaximum(6)
+        self.num_navegadores_spin.setMaximum(MAX_NAVEGADORES)
         self.num_navegadores_spin.setValue(1)
         self.num_navegadores_spin.setPrefix("🚀 ")
         self.num_navegadores_spin.setSuffix(" navegador(es)")
         nav_layout.addWidget(QLabel("Navegadores:"))
         nav_layout.addWidget(self.num_navegadores_spin)
+        self.num_procesos_spin = QSpinBox()
+        self.num_procesos_spin.setMinimum(1)
+        self.num_procesos_spin.setMaximum(max(1, os.cpu_count() or 1))
+        self.num_procesos_spin.setValue(1)
+        self.num_procesos_spin.setPrefix("🧩 ")
+        self.num_procesos_spin.setSuffix(" proceso(s)")
+        self.num_procesos_spin.setToolTip("Reparte los navegadores entre varios procesos (un núcleo cada uno)")
+        self.num_procesos_spin.valueChanged.connect(self._ajustar_maximo_navegadores)
+        nav_layout.addWidget(self.num_procesos_spin)
+        self.auto_navegadores_check = QCheckBox(f"⚡ Automático (hasta {MAX_NAVEGADORES_AUTO})")
+        self.auto_navegadores_check.setToolTip(
+            "Empieza con el número indicado y añade o retira navegadores según la latencia del servidor"
+        )
+        nav_layout.addWidget(self.auto_navegadores_check)
+        self.headless_check = QCheckBox("🙈 Sin ventanas (headless)")
+        self.headless_check.setChecked(MODO_HEADLESS)
+        nav_layout.addWidget(self.headless_check)
+        self.preseleccion_check = QCheckBox("📦 Pre-filtrar ENT")
+        self.preseleccion_check.setToolTip(
+            "Un navegador adicional consulta primero el estado de cada guía y descarta las entregadas"
+        )
+        nav_layout.addWidget(self.preseleccion_check)
+        self.peticiones_check = QCheckBox("🚀 Peticiones directas")
+        self.peticiones_check.setChecked(PETICIONES_DIRECTAS)
+        self.peticiones_check.setToolTip(
+            "Envía la búsqueda y la creación sin renderizar la página; usa la interfaz si el formulario no lo permite"
+        )
+        nav_layout.addWidget(self.peticiones_check)
+        self.trazas_check = QCheckBox("🧪 Trazas de diagnóstico")
+        self.trazas_check.setChecked(CAPTURA_TRAZAS)
+        self.trazas_check.setToolTip(
+            "Guarda la traza de Playwright solo de las guías con error o más lentas que el umbral"
+        )
+        nav_layout.addWidget(self.trazas_check)
         nav_layout.addStretch()
         layout_config.addRow("", nav_layout)
         
@@ -172,6 +222,11 @@ class VentanaPrincipal(QMainWindow):
         self.lbl_estado.setStyleSheet("font-weight: bold; font-size: 11pt;")
         layout_progreso.addWidget(self.lbl_estado)
         
+        self.lbl_navegadores = QLabel("")
+        self.lbl_navegadores.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.lbl_navegadores.setStyleSheet("font-size: 10pt; color: #7f8c8d;")
+        layout_progreso.addWidget(self.lbl_navegadores)
+        
         return grupo
 
     def _crear_panel_log(self):
@@ -180,24 +235,18 @@ class VentanaPrincipal(QMainWindow):
         
         layout_log = QVBoxLayout(grupo)
         
-        self.log_text = QTextEdit()
-        self.log_text.setReadOnly(True)
-        self.log_text.setMinimumHeight(150)
-        self.log_text.setStyleSheet("""
-            QTextEdit {
-                background-color: #2c3e50;
-                font-family: 'Consolas', monospace;
-                font-size: 10pt;
-                border: 2px solid #34495e;
-                border-radius: 5px;
-                color: #ecf0f1;
-                padding: 8px;
-            }
-        """)
-        layout_log.addWidget(self.log_text)
+        self.consola_log = ConsolaLog()
+        self._nuevo_log_sesion()
+        layout_log.addWidget(self.consola_log)
         
         return grupo
 
+    def _nuevo_log_sesion(self):
+        try:
+            self.consola_log.abrir_archivo()
+        except OSError:
+            pass  # sin log en disco la consola sigue funcionando
+
     def _crear_panel_botones(self):
         layout_botones = QHBoxLayout()
         layout_botones.setSpacing(10)
@@ -330,6 +379,21 @@ class VentanaPrincipal(QMainWindow):
                 self.log(f"✅ Sesión iniciada: {usuario}")
                 self.habilitar_controles(True)
 
+    def agregar_cuenta(self):
+        login = LoginWindow(self)
+        login.setWindowTitle("👥 Cuenta adicional - ALERTRAN")
+        if login.exec() == QDialog.DialogCode.Accepted:
+            usuario, password = login.get_credentials()
+            if not usuario or not password:
+                return
+            usuarios = [self.usuario_actual] + [u for u, _ in self.cuentas_adicionales]
+            if usuario in usuarios:
+                self._mostrar_error_validacion(f"La cuenta {usuario} ya está registrada")
+                return
+            self.cuentas_adicionales.append((usuario, password))
+            self.actualizar_estado_sesion()
+            self.log(f"👥 Cuenta adicional: {usuario} ({len(self.cuentas_adicionales) + 1} cuentas)")
+
     def cerrar_sesion(self):
         reply = QMessageBox.question(
             self, "Cerrar Sesión", 
@@ -340,6 +404,8 @@ class VentanaPrincipal(QMainWindow):
             self.sesion_activa = False
             self.usuario_actual = ""
             self.password_actual = ""
+            self.cuentas_adicionales = []
+            CacheSesion.limpiar()
             self.actualizar_estado_sesion()
             self.log("🔒 Sesión cerrada")
             self.habilitar_controles(False)
@@ -347,7 +413,8 @@ class VentanaPrincipal(QMainWindow):
 
     def actualizar_estado_sesion(self):
         if self.sesion_activa:
-            self.lbl_estado_sesion.setText(f"✅ ACTIVA - {self.usuario_actual}")
+            adicionales = f" (+{len(self.cuentas_adicionales)} cuentas)" if self.cuentas_adicionales else ""
+            self.lbl_estado_sesion.setText(f"✅ ACTIVA - {self.usuario_actual}{adicionales}")
             self.lbl_estado_sesion.setStyleSheet("""
                 QLabel {
                     background-color: #e8f8f5;
@@ -360,6 +427,7 @@ class VentanaPrincipal(QMainWindow):
             """)
             self.btn_login.setEnabled(False)
             self.btn_logout.setEnabled(True)
+            self.btn_cuenta.setEnabled(True)
         else:
             self.lbl_estado_sesion.setText("⛔ SESIÓN NO INICIADA")
             self.lbl_estado_sesion.setStyleSheet("""
@@ -374,6 +442,7 @@ class VentanaPrincipal(QMainWindow):
             """)
             self.btn_login.setEnabled(True)
             self.btn_logout.setEnabled(False)
+            self.btn_cuenta.setEnabled(False)
 
     def habilitar_controles(self, habilitar):
         self.btn_cargar_excel.setEnabled(habilitar)
@@ -409,16 +478,40 @@ class VentanaPrincipal(QMainWindow):
                 self.log(f"⚠️ Error al leer el archivo: {str(e)}")
 
     def log(self, mensaje):
-        ts = datetime.now().strftime("%H:%M:%S")
-        self.log_text.append(f"[{ts}] {mensaje}")
-        cursor = self.log_text.textCursor()
-        cursor.movePosition(QTextCursor.MoveOperation.End)
-        self.log_text.setTextCursor(cursor)
+        self._escribir_log([(datetime.now().strftime("%H:%M:%S"), mensaje)])
+
+    def _escribir_log(self, entradas):
+        """Añade varias líneas (hora, mensaje) a la consola y al log de sesión en disco"""
+        self.consola_log.agregar(entradas)
+
+    def aplicar_lote(self, lote):
+        """Aplica de una vez los eventos agrupados del proceso (ver SenalesAgrupadas)"""
+        if "log" in lote:
+            self._escribir_log(lote["log"])
+        for fila in lote.get("guia_procesada", ()):
+            self.agregar_al_historial(*fila)
+        if "progreso" in lote:
+            self.progress_bar.setValue(lote["progreso"])
+        if "estado" in lote:
+            self.lbl_estado.setText(lote["estado"])
+        if "tiempo_restante" in lote:
+            self.actualizar_tiempo_restante(lote["tiempo_restante"])
+        if "navegadores_activos" in lote:
+            self.actualizar_navegadores_activos(lote["navegadores_activos"])
+
+    def _vaciar_senales(self):
+        """Pinta lo pendiente antes de un evento de control (error, fin, archivo)"""
+        if self.agrupador:
+            self.agrupador.vaciar()
 
     def descargar_log(self):
         try:
-            contenido_log = self.log_text.toPlainText()
-            ruta = FileUtils.guardar_log(contenido_log, self.carpeta_descargas)
+            # El log completo está en disco; la consola solo muestra las últimas líneas
+            if self.consola_log.archivo:
+                ruta = FileUtils.copiar_log(self.consola_log.ruta_archivo, self.carpeta_descargas)
+            else:
+                contenido_log = "\n".join(linea for _, linea in self.consola_log.recientes)
+                ruta = FileUtils.guardar_log(contenido_log, self.carpeta_descargas)
             
             QMessageBox.information(
                 self, "✅ Éxito", 
@@ -455,6 +548,12 @@ class VentanaPrincipal(QMainWindow):
     def actualizar_tiempo_restante(self, tiempo):
         self.lbl_tiempo_restante.setText(tiempo)
 
+    def actualizar_navegadores_activos(self, cantidad):
+        self.lbl_navegadores.setText(f"🚀 Navegadores activos: {cantidad}")
+
+    def guardar_tiempos_pasos(self, tiempos):
+        self.tiempos_pasos = tiempos
+
     def mostrar_resumen(self):
         tiempo_total = datetime.now() - self.tiempo_inicio if self.tiempo_inicio else timedelta(0)
         tiempo_formateado = str(tiempo_total).split('.')[0]
@@ -466,6 +565,7 @@ class VentanaPrincipal(QMainWindow):
             errores=self.guias_error_count,
             advertencias=self.guias_advertencia_count,
             tiempo_total=tiempo_formateado,
+            tiempos=self.tiempos_pasos,
             parent=self
         )
         resumen.exec()
@@ -489,11 +589,16 @@ class VentanaPrincipal(QMainWindow):
 
         num_nav = self.num_navegadores_spin.value()
         
+        reanudar = self._preguntar_reanudar()
+        if reanudar is None:
+            return
+        
         if not self._confirmar_inicio_proceso(num_nav):
             return
 
         self.tiempo_inicio = datetime.now()
         self.guias_ent = []
+        self.tiempos_pasos = None
         self.guias_error_count = 0
         self.guias_advertencia_count = 0
         self.desviaciones_creadas = 0
@@ -504,14 +609,25 @@ class VentanaPrincipal(QMainWindow):
         self.btn_errores.setEnabled(False)
         self.btn_login.setEnabled(False)
         self.btn_logout.setEnabled(False)
+        self.btn_cuenta.setEnabled(False)
         self.num_navegadores_spin.setEnabled(False)
+        self.num_procesos_spin.setEnabled(False)
+        self.auto_navegadores_check.setEnabled(False)
+        self.headless_check.setEnabled(False)
+        self.preseleccion_check.setEnabled(False)
+        self.peticiones_check.setEnabled(False)
+        self.trazas_check.setEnabled(False)
         self.progress_bar.setValue(0)
         self.lbl_tiempo_restante.setText("⏱️ Calculando tiempo restante...")
-        self.log_text.clear()
+        # Cada proceso empieza consola y log en disco nuevos (como el antiguo clear())
+        self.consola_log.limpiar()
+        self._nuevo_log_sesion()
         self.historial_datos.clear()
 
         self.log(f"🚀 Iniciando con {num_nav} navegador(es)...")
         self.log(f"👤 Usuario: {self.usuario_actual}")
+        for usuario, _ in self.cuentas_adicionales:
+            self.log(f"👥 Cuenta adicional: {usuario}")
         self.log(f"📊 Total guías a procesar: {self.total_guias}")
         self.log(f"📁 Los archivos se guardarán en: {self.carpeta_descargas}")
 
@@ -522,21 +638,35 @@ class VentanaPrincipal(QMainWindow):
             self.tipo_combo.currentText(),
             self.ampliacion_input.text(),
             self.excel_path,
-            num_nav
+            num_nav,
+            headless=self.headless_check.isChecked(),
+            reanudar=reanudar,
+            auto_navegadores=self.auto_navegadores_check.isChecked(),
+            preseleccion_ent=self.preseleccion_check.isChecked(),
+            peticiones_directas=self.peticiones_check.isChecked(),
+            capturar_trazas=self.trazas_check.isChecked(),
+            cuentas_adicionales=self.cuentas_adicionales,
+            num_procesos=self.num_procesos_spin.value()
         )
 
         senales = self.proceso_thread.senales
-        senales.progreso.connect(self.progress_bar.setValue)
-        senales.estado.connect(self.lbl_estado.setText)
-        senales.log.connect(self.log)
-        senales.error.connect(self.mostrar_error)
-        senales.finalizado.connect(self.proceso_finalizado)
-        senales.archivo_errores.connect(self.archivo_errores_generado)
-        senales.guia_procesada.connect(self.agregar_al_historial)
-        senales.proceso_cancelado.connect(self.proceso_cancelado)
-        senales.tiempo_restante.connect(self.actualizar_tiempo_restante)
-
-        self.proceso_thread.start()
+        # Log, progreso, estado e historial llegan agrupados a ritmo fijo
+        if self.agrupador:
+            self.agrupador.detener()
+            self.agrupador.deleteLater()
+        self.agrupador = SenalesAgrupadas(senales, parent=self)
+        self.agrupador.lote.connect(self.aplicar_lote)
+        # Las que abren diálogos se encolan: en el loop de la interfaz no deben
+        # ejecutar un exec() modal dentro de un paso de la tarea del proceso
+        encolada = Qt.ConnectionType.QueuedConnection
+        senales.error.connect(self.mostrar_error, encolada)
+        senales.finalizado.connect(self.proceso_finalizado, encolada)
+        senales.archivo_errores.connect(self.archivo_errores_generado, encolada)
+        senales.proceso_cancelado.connect(self.proceso_cancelado, encolada)
+        senales.tiempos_pasos.connect(self.guardar_tiempos_pasos)
+
+        if self.proceso_thread.iniciar():
+            self.log("⚡ Motor en el loop de la interfaz (sin QThread)")
 
     def _mostrar_error_validacion(self, mensaje):
         msg = QMessageBox(self)
@@ -546,6 +676,51 @@ class VentanaPrincipal(QMainWindow):
         msg.setStandardButtons(QMessageBox.StandardButton.Ok)
         msg.exec()
 
+    def _ajustar_maximo_navegadores(self, num_procesos):
+        """MAX_NAVEGADORES por proceso, sin pasar del techo del modo automático"""
+        self.num_navegadores_spin.setMaximum(min(MAX_NAVEGADORES * num_procesos, MAX_NAVEGADORES_AUTO))
+
+    def _preguntar_reanudar(self):
+        """Ofrece reanudar si la bitácora tiene resultados de este archivo y parámetros.
+        Devuelve True (reanudar), False (desde cero) o None (cancelar)."""
+        try:
+            bitacora = Bitacora(Bitacora.calcular_clave(
+                self.excel_path,
+                self.ciudad_combo.currentText(),
+                self.tipo_combo.currentText(),
+                self.ampliacion_input.text()
+            ))
+            try:
+                completadas = len(bitacora.guias_terminadas())
+            finally:
+                bitacora.cerrar()
+        except Exception as e:
+            self.log(f"⚠️ No se pudo consultar la bitácora: {str(e)}")
+            return False
+        
+        if completadas == 0:
+            return False
+        
+        reply = QMessageBox(self)
+        reply.setWindowTitle("⏯️ PROCESO PREVIO ENCONTRADO")
+        reply.setText(
+            f"Este archivo ya tiene {completadas} guía(s) completadas con los mismos parámetros.\n\n"
+            f"¿Desea reanudar solo las guías pendientes?"
+        )
+        reply.setIcon(QMessageBox.Icon.Question)
+        
+        btn_reanudar = reply.addButton("⏯️ REANUDAR", QMessageBox.ButtonRole.YesRole)
+        btn_cero = reply.addButton("🔄 DESDE CERO", QMessageBox.ButtonRole.NoRole)
+        reply.addButton("❌ CANCELAR", QMessageBox.ButtonRole.RejectRole)
+        reply.setDefaultButton(btn_reanudar)
+        reply.exec()
+        
+        if reply.clickedButton() == btn_reanudar:
+            return True
+        if reply.clickedButton() == btn_cero:
+            return False
+        return None
+
     def _confirmar_inicio_proceso(self, num_nav):
         mensaje = self._crear_mensaje_confirmacion(num_nav)
         
@@ -570,6 +745,7 @@ class VentanaPrincipal(QMainWindow):
     def _crear_mensaje_confirmacion(self, num_nav):
         color_guias = "#4CAF50" if self.total_guias < 50 else "#FF9800" if self.total_guias < 100 else "#f44336"
         emoji_guias = "✅" if self.total_guias < 50 else "⚠️" if self.total_guias < 100 else "🔴"
+        modo_nav = f" (automático, hasta {MAX_NAVEGADORES_AUTO})" if self.auto_navegadores_check.isChecked() else ""
         
         mensaje = f"""
         <div style="font-family: Arial; text-align: center; color: white;">
@@ -577,7 +753,7 @@ class VentanaPrincipal(QMainWindow):
             
             <table style="width: 100%; margin: 10px 0; border-collapse: collapse;">
                 <tr><td style="padding: 5px; background: #333;">🌐 Navegadores:</td>
-                    <td style="padding: 5px; background: #2d2d2d;">{num_nav} simultáneos</td></tr>
+                    <td style="padding: 5px; background: #2d2d2d;">{num_nav} simultáneos{modo_nav}</td></tr>
                 <tr><td style="padding: 5px; background: #333;">👤 Usuario:</td>
                     <td style="padding: 5px; background: #2d2d2d;">{self.usuario_actual}</td></tr>
                 <tr><td style="padding: 5px; background: #333;">📋 Total guías:</td>
@@ -620,30 +796,42 @@ class VentanaPrincipal(QMainWindow):
             self.btn_cancelar.setText("⏹ CANCELANDO...")
 
     def proceso_cancelado(self):
+        self._vaciar_senales()
         self.log("✅ Proceso cancelado por usuario")
         self.btn_cancelar.setText("⏹ CANCELAR PROCESO")
         self.lbl_tiempo_restante.setText("")
         self.proceso_finalizado()
 
     def mostrar_error(self, mensaje):
+        self._vaciar_senales()
         QMessageBox.critical(self, "Error", mensaje)
         self.log(f"🔴 ERROR: {mensaje}")
         self.lbl_tiempo_restante.setText("")
         self.proceso_finalizado()
 
     def proceso_finalizado(self):
+        if self.agrupador:
+            self.agrupador.detener()
         self.btn_iniciar.setEnabled(True)
         self.btn_cancelar.setEnabled(False)
         self.btn_cancelar.setText("⏹ CANCELAR PROCESO")
         self.btn_cargar_excel.setEnabled(True)
         self.btn_login.setEnabled(False)
         self.btn_logout.setEnabled(True)
+        self.btn_cuenta.setEnabled(True)
         self.num_navegadores_spin.setEnabled(True)
+        self.num_procesos_spin.setEnabled(True)
+        self.auto_navegadores_check.setEnabled(True)
+        self.headless_check.setEnabled(True)
+        self.preseleccion_check.setEnabled(True)
+        self.peticiones_check.setEnabled(True)
+        self.trazas_check.setEnabled(True)
         self.lbl_estado.setText("✅ Finalizado")
         
         self.mostrar_resumen()
 
     def archivo_errores_generado(self, ruta):
+        self._vaciar_senales()
         self.btn_errores.setEnabled(True)
         self.error_path = ruta
         
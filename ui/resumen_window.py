@@ -2,24 +2,28 @@
 """
 Ventana de resumen del proceso
 """
-from PySide6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QFrame, QWidget
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QFrame, QWidget,
+    QTableWidget, QTableWidgetItem, QHeaderView
+)
 from PySide6.QtGui import QFont
 from PySide6.QtCore import Qt
 
 class ResumenWindow(QDialog):
     """Ventana de resumen al finalizar el proceso"""
     
-    def __init__(self, total_guias, desviadas, entregadas, errores, advertencias, tiempo_total, parent=None):
+    def __init__(self, total_guias, desviadas, entregadas, errores, advertencias, tiempo_total,
+                 tiempos=None, parent=None):
         super().__init__(parent)
         self.setWindowTitle("📊 RESUMEN DEL PROCESO")
         self.setMinimumWidth(500)
         self.setMinimumHeight(400)
         self.setModal(True)
         
-        self._setup_ui(total_guias, desviadas, entregadas, errores, advertencias, tiempo_total)
+        self._setup_ui(total_guias, desviadas, entregadas, errores, advertencias, tiempo_total, tiempos)
         self._setup_styles()
 
-    def _setup_ui(self, total_guias, desviadas, entregadas, errores, advertencias, tiempo_total):
+    def _setup_ui(self, total_guias, desviadas, entregadas, errores, advertencias, tiempo_total, tiempos):
         layout = QVBoxLayout(self)
         layout.setSpacing(20)
         layout.setContentsMargins(30, 30, 30, 30)
@@ -60,11 +64,34 @@ class ResumenWindow(QDialog):
         tiempo_label.setStyleSheet("font-size: 14pt; font-weight: bold; color: #bdc3c7; margin-top: 15px;")
         layout.addWidget(tiempo_label)
         
+        if tiempos:
+            layout.addWidget(self._crear_tabla_tiempos(tiempos))
+        
         btn_cerrar = QPushButton("ACEPTAR")
         btn_cerrar.clicked.connect(self.accept)
         btn_cerrar.setObjectName("btn_cerrar")
         layout.addWidget(btn_cerrar)
 
+    def _crear_tabla_tiempos(self, tiempos):
+        """Tabla con p50/p95/máx (segundos) de cada paso medido"""
+        tabla = QTableWidget(len(tiempos), 5)
+        tabla.setHorizontalHeaderLabels(["PASO", "N", "P50 (s)", "P95 (s)", "MÁX (s)"])
+        tabla.verticalHeader().setVisible(False)
+        tabla.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        tabla.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        
+        for fila, paso in enumerate(tiempos):
+            valores = [paso["etiqueta"], str(paso["n"]),
+                       f"{paso['p50']:.2f}", f"{paso['p95']:.2f}", f"{paso['max']:.2f}"]
+            for columna, valor in enumerate(valores):
+                item = QTableWidgetItem(valor)
+                if columna > 0:
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                tabla.setItem(fila, columna, item)
+        
+        tabla.setMinimumHeight(min(40 + 30 * len(tiempos), 320))
+        return tabla
+
     def _crear_stat_widget(self, titulo, valor, color):
         widget = QWidget()
         layout = QVBoxLayout(widget)
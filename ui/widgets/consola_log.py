@@ -0,0 +1,131 @@
+# ui/widgets/consola_log.py
+"""
+Consola de actividad acotada: texto plano por líneas con filtro por nivel;
+el log completo de la sesión se escribe en disco
+"""
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QPlainTextEdit
+
+from config.settings import MAX_LINEAS_LOG, MAX_ARCHIVOS_LOG, RUTA_LOGS
+from utils.file_utils import FileUtils
+
+INFO, AVISO, ERROR = 0, 1, 2
+
+# El nivel se deduce del icono con el que empiezan los mensajes del proceso
+MARCAS_ERROR = ("❌", "🔴", "⛔", "💥")
+MARCAS_AVISO = ("⚠️", "⌛", "🔌", "🛠️", "↩️", "🛑")
+
+FILTROS = (
+    ("Todo", INFO),
+    ("Avisos y errores", AVISO),
+    ("Solo errores", ERROR),
+)
+
+def nivel_mensaje(mensaje):
+    """Nivel de una línea según su icono (los mensajes de los trabajadores llevan [NavN] delante)"""
+    if any(marca in mensaje for marca in MARCAS_ERROR):
+        return ERROR
+    if any(marca in mensaje for marca in MARCAS_AVISO):
+        return AVISO
+    return INFO
+
+class ConsolaLog(QWidget):
+    """QPlainTextEdit con tope de líneas, escritura por lotes y filtro por nivel"""
+
+    def __init__(self, max_lineas=MAX_LINEAS_LOG, parent=None):
+        super().__init__(parent)
+        # Últimas líneas con su nivel, para volver a pintar al cambiar el filtro
+        self.recientes = deque(maxlen=max_lineas)
+        self.minimo = INFO
+        self.archivo = None
+        self.ruta_archivo = None
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        fila_filtro = QHBoxLayout()
+        fila_filtro.addStretch()
+        fila_filtro.addWidget(QLabel("Mostrar:"))
+        self.filtro_combo = QComboBox()
+        for etiqueta, nivel in FILTROS:
+            self.filtro_combo.addItem(etiqueta, nivel)
+        self.filtro_combo.currentIndexChanged.connect(self._cambiar_filtro)
+        fila_filtro.addWidget(self.filtro_combo)
+        layout.addLayout(fila_filtro)
+
+        self.texto = QPlainTextEdit()
+        self.texto.setReadOnly(True)
+        self.texto.setUndoRedoEnabled(False)
+        # Las líneas más antiguas se descartan: memoria y repintado no crecen con la duración
+        self.texto.setMaximumBlockCount(max_lineas)
+        self.texto.setMinimumHeight(150)
+        self.texto.setStyleSheet("""
+            QPlainTextEdit {
+                background-color: #2c3e50;
+                font-family: 'Consolas', monospace;
+                font-size: 10pt;
+                border: 2px solid #34495e;
+                border-radius: 5px;
+                color: #ecf0f1;
+                padding: 8px;
+            }
+        """)
+        layout.addWidget(self.texto)
+
+    def abrir_archivo(self, carpeta=RUTA_LOGS):
+        """Empieza un log en disco (cerrando el anterior) y elimina los más antiguos"""
+        self.cerrar_archivo()
+        carpeta = Path(carpeta)
+        carpeta.mkdir(parents=True, exist_ok=True)
+        anteriores = sorted(carpeta.glob("sesion_*.log"))
+        for ruta in anteriores[:max(len(anteriores) - MAX_ARCHIVOS_LOG + 1, 0)]:
+            try:
+                ruta.unlink()
+            except OSError:
+                pass
+
+        marca = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.ruta_archivo = FileUtils.generar_nombre_unico(carpeta, f"sesion_{marca}", "log")
+        self.archivo = open(self.ruta_archivo, "a", encoding="utf-8")
+
+    def cerrar_archivo(self):
+        if self.archivo:
+            self.archivo.close()
+            self.archivo = None
+
+    def agregar(self, entradas):
+        """Añade [(hora, mensaje)]: todas al archivo, las del nivel filtrado a la vista"""
+        lineas = [(nivel_mensaje(mensaje), f"[{hora}] {mensaje}") for hora, mensaje in entradas]
+        if self.archivo:
+            try:
+                self.archivo.write("".join(f"{linea}\n" for _, linea in lineas))
+                self.archivo.flush()
+            except OSError:
+                self.cerrar_archivo()
+
+        self.recientes.extend(lineas)
+        visibles = [linea for nivel, linea in lineas if nivel >= self.minimo]
+        if not visibles:
+            return
+        barra = self.texto.verticalScrollBar()
+        al_final = barra.value() == barra.maximum()
+        self.texto.appendPlainText("\n".join(visibles))
+        if al_final:
+            # Solo se sigue el final si el usuario no se desplazó hacia arriba
+            barra.setValue(barra.maximum())
+
+    def _cambiar_filtro(self, indice):
+        self.minimo = self.filtro_combo.itemData(indice)
+        self.texto.setPlainText(
+            "\n".join(linea for nivel, linea in self.recientes if nivel >= self.minimo)
+        )
+        barra = self.texto.verticalScrollBar()
+        barra.setValue(barra.maximum())
+
+    def limpiar(self):
+        """Vacía la vista; el archivo de la sesión conserva todo"""
+        self.recientes.clear()
+        self.texto.clear()
@@ -0,0 +1,212 @@
+# utils/almacen_trabajos.py
+"""
+Almacén de trabajos compartido (SQLite en una ruta común) para repartir un lote de guías
+entre varias instancias mediante arriendos con caducidad
+"""
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from config.settings import DURACION_ARRIENDO
+
+
+class AlmacenTrabajos:
+    """Cola persistente de guías por lote.
+
+    Cada guía pasa de PENDIENTE a ASIGNADA (con arriendo hasta `arriendo_hasta`) y a TERMINADA.
+    Un arriendo caducado vuelve a estar disponible. Cada asignación incrementa `ficha`: solo
+    quien tiene la ficha vigente puede completar la guía, y solo una vez."""
+
+    def __init__(self, ruta: Union[str, Path]):
+        self.ruta = Path(ruta)
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        # Transacciones manuales (BEGIN IMMEDIATE); la conexión se usa también desde el executor
+        self.conexion = sqlite3.connect(
+            str(self.ruta), timeout=30, isolation_level=None, check_same_thread=False
+        )
+        # WAL necesita memoria compartida en el mismo equipo: en una ruta de red se usa el journal clásico
+        self.conexion.execute("PRAGMA journal_mode=DELETE")
+        self.conexion.executescript("""
+            CREATE TABLE IF NOT EXISTS lotes (
+                lote TEXT PRIMARY KEY,
+                excel TEXT NOT NULL,
+                ciudad TEXT NOT NULL,
+                tipo TEXT NOT NULL,
+                ampliacion TEXT NOT NULL,
+                creado TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS trabajos (
+                lote TEXT NOT NULL,
+                guia TEXT NOT NULL,
+                estado TEXT NOT NULL DEFAULT 'PENDIENTE',
+                instancia TEXT,
+                arriendo_hasta REAL,
+                ficha INTEGER NOT NULL DEFAULT 0,
+                asignaciones INTEGER NOT NULL DEFAULT 0,
+                resultado TEXT,
+                detalle TEXT,
+                terminado TEXT,
+                PRIMARY KEY (lote, guia)
+            );
+            CREATE INDEX IF NOT EXISTS idx_trabajos_estado ON trabajos (lote, estado);
+        """)
+
+    def _transaccion(self, operacion):
+        """Ejecuta `operacion(cursor)` en una transacción de escritura exclusiva entre instancias"""
+        with self.lock:
+            cursor = self.conexion.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                resultado = operacion(cursor)
+                cursor.execute("COMMIT")
+                return resultado
+            except BaseException:
+                cursor.execute("ROLLBACK")
+                raise
+
+    def cargar(self, lote: str, guias: Iterable[str], excel: str, ciudad: str, tipo: str,
+               ampliacion: str) -> int:
+        """Registra el lote y sus guías (idempotente); devuelve cuántas guías nuevas se añadieron"""
+        def operacion(cursor):
+            cursor.execute(
+                "INSERT OR IGNORE INTO lotes (lote, excel, ciudad, tipo, ampliacion, creado) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (lote, excel, ciudad, tipo, ampliacion, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            )
+            antes = self.conexion.total_changes
+            cursor.executemany(
+                "INSERT OR IGNORE INTO trabajos (lote, guia) VALUES (?, ?)",
+                [(lote, guia) for guia in dict.fromkeys(guias)]
+            )
+            return self.conexion.total_changes - antes
+        return self._transaccion(operacion)
+
+    def parametros(self, lote: str) -> Optional[Dict[str, str]]:
+        with self.lock:
+            fila = self.conexion.execute(
+                "SELECT excel, ciudad, tipo, ampliacion FROM lotes WHERE lote = ?", (lote,)
+            ).fetchone()
+        if fila is None:
+            return None
+        return dict(zip(("excel", "ciudad", "tipo", "ampliacion"), fila))
+
+    def arrendar(self, lote: str, instancia: str, cantidad: int,
+                 duracion: float = DURACION_ARRIENDO) -> List[Tuple[str, int]]:
+        """Reclama arriendos caducados y asigna hasta `cantidad` guías; devuelve [(guía, ficha)]"""
+        def operacion(cursor):
+            ahora = time.time()
+            cursor.execute(
+                "UPDATE trabajos SET estado = 'PENDIENTE', instancia = NULL, arriendo_hasta = NULL "
+                "WHERE lote = ? AND estado = 'ASIGNADA' AND arriendo_hasta < ?",
+                (lote, ahora)
+            )
+            guias = [fila[0] for fila in cursor.execute(
+                "SELECT guia FROM trabajos WHERE lote = ? AND estado = 'PENDIENTE' "
+                "ORDER BY asignaciones, rowid LIMIT ?",
+                (lote, cantidad)
+            ).fetchall()]
+            asignadas = []
+            for guia in guias:
+                cursor.execute(
+                    "UPDATE trabajos SET estado = 'ASIGNADA', instancia = ?, arriendo_hasta = ?, "
+                    "ficha = ficha + 1, asignaciones = asignaciones + 1 WHERE lote = ? AND guia = ?",
+                    (instancia, ahora + duracion, lote, guia)
+                )
+                ficha = cursor.execute(
+                    "SELECT ficha FROM trabajos WHERE lote = ? AND guia = ?", (lote, guia)
+                ).fetchone()[0]
+                asignadas.append((guia, ficha))
+            return asignadas
+        return self._transaccion(operacion)
+
+    def renovar(self, lote: str, instancia: str, fichas: Dict[str, int],
+                duracion: float = DURACION_ARRIENDO) -> List[str]:
+        """Prolonga los arriendos vigentes; devuelve las guías cuyo arriendo se perdió"""
+        def operacion(cursor):
+            hasta = time.time() + duracion
+            perdidas = []
+            for guia, ficha in fichas.items():
+                cursor.execute(
+                    "UPDATE trabajos SET arriendo_hasta = ? WHERE lote = ? AND guia = ? "
+                    "AND estado = 'ASIGNADA' AND instancia = ? AND ficha = ?",
+                    (hasta, lote, guia, instancia, ficha)
+                )
+                if cursor.rowcount == 0:
+                    perdidas.append(guia)
+            return perdidas
+        return self._transaccion(operacion)
+
+    def completar(self, lote: str, guia: str, ficha: int, resultado: str, detalle: str = "") -> bool:
+        """Marca la guía como terminada si la ficha sigue vigente; False si ya no corresponde"""
+        def operacion(cursor):
+            cursor.execute(
+                "UPDATE trabajos SET estado = 'TERMINADA', resultado = ?, detalle = ?, terminado = ?, "
+                "arriendo_hasta = NULL WHERE lote = ? AND guia = ? AND estado = 'ASIGNADA' AND ficha = ?",
+                (resultado, detalle, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), lote, guia, ficha)
+            )
+            return cursor.rowcount == 1
+        return self._transaccion(operacion)
+
+    def liberar(self, lote: str, instancia: str, excluir: Iterable[str] = ()) -> int:
+        """Devuelve a PENDIENTE las guías aún asignadas a la instancia (cierre o cancelación),
+        salvo las de `excluir` (ya procesadas aunque su resultado no se haya podido escribir)"""
+        excluir = set(excluir)
+        def operacion(cursor):
+            guias = [fila[0] for fila in cursor.execute(
+                "SELECT guia FROM trabajos WHERE lote = ? AND estado = 'ASIGNADA' AND instancia = ?",
+                (lote, instancia)
+            ).fetchall() if fila[0] not in excluir]
+            cursor.executemany(
+                "UPDATE trabajos SET estado = 'PENDIENTE', instancia = NULL, arriendo_hasta = NULL "
+                "WHERE lote = ? AND guia = ?",
+                [(lote, guia) for guia in guias]
+            )
+            return len(guias)
+        return self._transaccion(operacion)
+
+    def resumen(self, lote: str) -> Dict[str, int]:
+        """Guías por estado (y por resultado las terminadas)"""
+        with self.lock:
+            filas = self.conexion.execute(
+                "SELECT estado, COALESCE(resultado, ''), COUNT(*) FROM trabajos "
+                "WHERE lote = ? GROUP BY estado, resultado",
+                (lote,)
+            ).fetchall()
+        resumen = {"PENDIENTE": 0, "ASIGNADA": 0, "TERMINADA": 0}
+        for estado, resultado, cantidad in filas:
+            resumen[estado] = resumen.get(estado, 0) + cantidad
+            if resultado:
+                resumen[resultado] = resumen.get(resultado, 0) + cantidad
+        return resumen
+
+    def instancias(self, lote: str) -> List[Tuple[str, int, float]]:
+        """(instancia, guías asignadas, segundos hasta el primer arriendo que caduca)"""
+        with self.lock:
+            filas = self.conexion.execute(
+                "SELECT instancia, COUNT(*), MIN(arriendo_hasta) FROM trabajos "
+                "WHERE lote = ? AND estado = 'ASIGNADA' GROUP BY instancia",
+                (lote,)
+            ).fetchall()
+        ahora = time.time()
+        return [(instancia, cantidad, hasta - ahora) for instancia, cantidad, hasta in filas]
+
+    def resultados(self, lote: str, estados: Iterable[str]) -> List[Tuple[str, str, str]]:
+        """(guía, resultado, detalle) de las guías terminadas con alguno de `estados`"""
+        estados = list(estados)
+        marcadores = ", ".join("?" for _ in estados)
+        with self.lock:
+            return self.conexion.execute(
+                f"SELECT guia, resultado, detalle FROM trabajos WHERE lote = ? AND estado = 'TERMINADA' "
+                f"AND resultado IN ({marcadores}) ORDER BY rowid",
+                (lote, *estados)
+            ).fetchall()
+
+    def cerrar(self):
+        try:
+            self.conexion.close()
+        except sqlite3.Error:
+            pass
@@ -0,0 +1,87 @@
+# utils/bitacora.py
+"""
+Bitácora local (SQLite en modo WAL) con el resultado de cada guía para poder reanudar
+"""
+import hashlib
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, List, Set, Union
+
+from config.settings import RUTA_BITACORA, REANUDAR_REINTENTA_ERRORES
+
+
+class Bitacora:
+    """Registro append-only de resultados por guía, indexado por archivo y parámetros"""
+
+    def __init__(self, clave: str, ruta: Union[str, Path] = RUTA_BITACORA):
+        self.clave = clave
+        self.ruta = Path(ruta)
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        self.conexion = sqlite3.connect(str(self.ruta))
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        self.conexion.execute("PRAGMA synchronous=NORMAL")
+        self.conexion.execute("""
+            CREATE TABLE IF NOT EXISTS resultados (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                clave TEXT NOT NULL,
+                guia TEXT NOT NULL,
+                estado TEXT NOT NULL,
+                detalle TEXT,
+                navegador TEXT,
+                fecha TEXT NOT NULL
+            )
+        """)
+        self.conexion.execute(
+            "CREATE INDEX IF NOT EXISTS idx_resultados_clave ON resultados (clave, guia)"
+        )
+        self.conexion.commit()
+
+    @staticmethod
+    def calcular_clave(excel_path: Union[str, Path], ciudad: str, tipo: str, ampliacion: str) -> str:
+        """Hash del archivo de entrada y de los parámetros de la ejecución"""
+        h = hashlib.sha256()
+        with open(excel_path, 'rb') as f:
+            for bloque in iter(lambda: f.read(1 << 16), b""):
+                h.update(bloque)
+        for parametro in (ciudad, tipo, ampliacion):
+            h.update(b"\0" + str(parametro).encode("utf-8"))
+        return h.hexdigest()
+
+    def registrar(self, guia: str, estado: str, detalle: str = "", navegador: str = ""):
+        """Añade el resultado de una guía y lo persiste inmediatamente"""
+        fecha = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.conexion.execute(
+            "INSERT INTO resultados (clave, guia, estado, detalle, navegador, fecha) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (self.clave, guia, estado, detalle, navegador, fecha)
+        )
+        self.conexion.commit()
+
+    def guias_terminadas(self) -> Set[str]:
+        """Guías cuyo último resultado registrado es definitivo"""
+        filas = self.conexion.execute(
+            "SELECT guia, estado FROM resultados WHERE id IN "
+            "(SELECT MAX(id) FROM resultados WHERE clave = ? GROUP BY guia)",
+            (self.clave,)
+        ).fetchall()
+        return {
+            guia for guia, estado in filas
+            if not (REANUDAR_REINTENTA_ERRORES and estado == "ERROR")
+        }
+
+    def pendientes(self, guias: Iterable[str]) -> List[str]:
+        """Filtra las guías que aún no tienen resultado definitivo"""
+        terminadas = self.guias_terminadas()
+        return [guia for guia in guias if guia not in terminadas]
+
+    def descartar(self):
+        """Elimina los registros previos de esta clave (nuevo proceso desde cero)"""
+        self.conexion.execute("DELETE FROM resultados WHERE clave = ?", (self.clave,))
+        self.conexion.commit()
+
+    def cerrar(self):
+        try:
+            self.conexion.close()
+        except sqlite3.Error:
+            pass
@@ -3,7 +3,10 @@
 Utilidades para manejo de archivos
 """
 from pathlib import Path
+import csv
+import json
 import os
+import shutil
 from datetime import datetime
 from openpyxl import Workbook, load_workbook
 from typing import List, Optional
@@ -88,6 +91,27 @@ class FileUtils:
         wb.save(ruta_archivo)
         return str(ruta_archivo)
 
+    @staticmethod
+    def guardar_tiempos(resumen: dict, muestras: List, carpeta: Path) -> Optional[str]:
+        """Guarda el resumen de tiempos por paso (JSON) y cada medición (CSV, mismo nombre)"""
+        if not muestras:
+            return None
+        
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        base_nombre = f"tiempos_alertran_{timestamp}"
+        ruta_json = FileUtils.generar_nombre_unico(carpeta, base_nombre, "json")
+        
+        with open(ruta_json, 'w', encoding='utf-8') as f:
+            json.dump(resumen, f, ensure_ascii=False, indent=2)
+        
+        with open(ruta_json.with_suffix(".csv"), 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f, delimiter=';')
+            writer.writerow(["Paso", "Navegador", "Inicio (s)", "Duración (s)", "Error"])
+            for paso, nav_idx, inicio, duracion, error in muestras:
+                writer.writerow([paso, f"Nav{nav_idx}", f"{inicio:.3f}", f"{duracion:.3f}", int(error)])
+        
+        return str(ruta_json)
+
     @staticmethod
     def guardar_log(log_contenido: str, carpeta: Path) -> str:
         """Guarda el log completo"""
@@ -98,4 +122,15 @@ class FileUtils:
         with open(ruta_archivo, 'w', encoding='utf-8') as f:
             f.write(log_contenido)
         
-        return str(ruta_archivo)
\ No newline at end of file
+        return str(ruta_archivo)
+
+    @staticmethod
+    def copiar_log(origen: Path, carpeta: Path) -> str:
+        """Copia el log de sesión (en disco) a la carpeta indicada sin cargarlo en memoria"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        base_nombre = f"log_alertran_{timestamp}"
+        ruta_archivo = FileUtils.generar_nombre_unico(carpeta, base_nombre, "txt")
+        
+        shutil.copyfile(origen, ruta_archivo)
+        
+        return str(ruta_archivo)
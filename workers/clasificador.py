@@ -0,0 +1,50 @@
+# workers/clasificador.py
+"""
+Clasificador del resultado de creación a partir del texto de todos los frames
+"""
+import re
+from functools import lru_cache
+from typing import Iterable, Optional, Sequence, Tuple
+
+from config.constants import FRAMES_IGNORADOS_MENSAJES
+
+# Recorre el frameset (mismo origen) y devuelve el texto visible en una sola evaluación
+_JS_TEXTO_FRAMES = """
+(ignorados) => {
+    const textos = [];
+    const visitar = (win, nombre) => {
+        let doc;
+        try { doc = win.document; } catch (e) { return; }
+        if (!doc) return;
+        if (!ignorados.includes(nombre) && doc.body) {
+            textos.push(doc.body.innerText || "");
+        }
+        for (const f of doc.querySelectorAll("frame, iframe")) {
+            visitar(f.contentWindow, f.name || "");
+        }
+    };
+    visitar(window, "");
+    return textos.join("\\n");
+}
+"""
+
+
+async def recolectar_texto(page, ignorados: Iterable[str] = FRAMES_IGNORADOS_MENSAJES) -> str:
+    """Texto de todos los frames de la página (un único round trip CDP)"""
+    return await page.evaluate(_JS_TEXTO_FRAMES, list(ignorados))
+
+
+@lru_cache(maxsize=None)
+def _expresion(patron: str):
+    """El patrón debe aparecer como palabras completas ("Error" no coincide con "Errores")"""
+    cuerpo = re.escape(" ".join(patron.split()).lower())
+    return re.compile(rf"(?<!\w){cuerpo}(?!\w)")
+
+
+def clasificar(texto: str, reglas: Sequence[Tuple[bool, str]]) -> Tuple[Optional[bool], Optional[str]]:
+    """Aplica las reglas en orden de prioridad; devuelve (resultado, patrón) o (None, None)"""
+    texto = " ".join(texto.split()).lower()
+    for resultado, patron in reglas:
+        if _expresion(patron).search(texto):
+            return resultado, patron
+    return None, None
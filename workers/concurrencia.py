@@ -0,0 +1,55 @@
+# workers/concurrencia.py
+"""
+Control adaptativo del número de navegadores según latencia y tasa de error
+"""
+from config.settings import (
+    MAX_NAVEGADORES_AUTO, TOLERANCIA_LATENCIA_AUTO, UMBRAL_ERROR_AUTO, MIN_MUESTRAS_AUTO
+)
+
+
+class ControladorConcurrencia:
+    """Decide si añadir o retirar un navegador a partir de las guías completadas en cada ventana"""
+
+    def __init__(self, minimo=1, maximo=MAX_NAVEGADORES_AUTO, tolerancia=TOLERANCIA_LATENCIA_AUTO,
+                 umbral_error=UMBRAL_ERROR_AUTO, min_muestras=MIN_MUESTRAS_AUTO):
+        self.minimo = minimo
+        self.maximo = maximo
+        self.tolerancia = tolerancia
+        self.umbral_error = umbral_error
+        self.min_muestras = min_muestras
+        self.muestras = []
+        self.latencia_base = None
+
+    def registrar(self, duracion, error=False):
+        """Añade la duración (s) de una guía terminada"""
+        self.muestras.append((duracion, error))
+
+    def decidir(self, activos, pendientes):
+        """Devuelve +1 (añadir), -1 (retirar) o 0 (mantener)"""
+        if len(self.muestras) < self.min_muestras:
+            return 0
+
+        muestras, self.muestras = self.muestras, []
+        latencias = sorted(duracion for duracion, _ in muestras)
+        p50 = latencias[len(latencias) // 2]
+        tasa_error = sum(1 for _, error in muestras if error) / len(muestras)
+
+        if self.latencia_base is None or p50 < self.latencia_base:
+            self.latencia_base = p50
+
+        degradado = p50 > self.latencia_base * (1 + self.tolerancia)
+        if (degradado or tasa_error > self.umbral_error) and activos > self.minimo:
+            return -1
+
+        if degradado:
+            # Ya en el mínimo: se acepta la nueva latencia como referencia
+            self.latencia_base = p50
+            return 0
+
+        estable = p50 <= self.latencia_base * (1 + self.tolerancia / 2)
+        if estable and activos < self.maximo and pendientes > activos:
+            return 1
+
+        # La referencia se desplaza lentamente hacia la latencia actual
+        self.latencia_base = self.latencia_base * 0.9 + p50 * 0.1
+        return 0
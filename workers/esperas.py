@@ -0,0 +1,94 @@
+# workers/esperas.py
+"""
+Esperas por condición real del DOM y de la red (en lugar de pausas fijas)
+"""
+import asyncio
+import time
+
+from config.settings import (
+    MARGEN_SEGURIDAD, TIEMPO_RED_INACTIVA, TIEMPO_MAX_RED_INACTIVA
+)
+
+# Tipos de recurso que indican que ALERTRAN todavía está respondiendo
+TIPOS_RASTREADOS = {"document", "xhr", "fetch"}
+
+
+class EsperaPagina:
+    """Rastrea las peticiones pendientes de una página y espera condiciones de preparación"""
+
+    def __init__(self, page, margen_ms=MARGEN_SEGURIDAD):
+        self.page = page
+        self.margen_ms = margen_ms
+        self.pendientes = set()
+        self.ultima_actividad = time.monotonic()
+
+        page.on("request", self._peticion_iniciada)
+        page.on("requestfinished", self._peticion_terminada)
+        page.on("requestfailed", self._peticion_terminada)
+
+    def _peticion_iniciada(self, request):
+        if request.resource_type in TIPOS_RASTREADOS:
+            self.pendientes.add(request)
+            self.ultima_actividad = time.monotonic()
+
+    def _peticion_terminada(self, request):
+        if request in self.pendientes:
+            self.pendientes.discard(request)
+            self.ultima_actividad = time.monotonic()
+
+    async def margen(self):
+        """Pausa corta configurable tras cumplirse una condición"""
+        if self.margen_ms > 0:
+            await asyncio.sleep(self.margen_ms / 1000)
+
+    async def red_inactiva(self, quieto=TIEMPO_RED_INACTIVA, timeout=TIEMPO_MAX_RED_INACTIVA):
+        """Espera a que no haya documentos/XHR pendientes durante `quieto` ms contados desde la
+        llamada o desde la última petición si es posterior. Así no devuelve de inmediato si el
+        evento de la petición que disparó la acción aún no llegó."""
+        inicio = time.monotonic()
+        limite = time.monotonic() + timeout / 1000
+        while time.monotonic() < limite:
+            inactivo_ms = (time.monotonic() - max(self.ultima_actividad, inicio)) * 1000
+            if not self.pendientes and inactivo_ms >= quieto:
+                return True
+            await asyncio.sleep(0.05)
+        return False
+
+    async def overlay_oculto(self, timeout=10000):
+        """Espera a que desaparezca el overlay de carga"""
+        try:
+            await self.page.wait_for_selector("#capa_selector", state="hidden", timeout=timeout)
+            return True
+        except:
+            return False
+
+    async def campo_habilitado(self, locator, timeout=10000):
+        """Espera a que un campo sea visible y editable"""
+        await locator.wait_for(state="visible", timeout=timeout)
+        handle = await locator.element_handle(timeout=timeout)
+        try:
+            await handle.wait_for_element_state("editable", timeout=timeout)
+        finally:
+            await handle.dispose()
+
+    async def frame_cargado(self, nombre, timeout=10000):
+        """Espera a que exista el frame `nombre` y termine de cargar"""
+        limite = time.monotonic() + timeout / 1000
+        frame = self.page.frame(name=nombre)
+        while frame is None and time.monotonic() < limite:
+            await asyncio.sleep(0.05)
+            frame = self.page.frame(name=nombre)
+        if frame is None:
+            return False
+        restante = max(int((limite - time.monotonic()) * 1000), 1)
+        try:
+            await frame.wait_for_load_state("load", timeout=restante)
+            return True
+        except:
+            return False
+
+    async def pagina_lista(self, timeout=10000):
+        """Overlay oculto, red estable y margen de seguridad"""
+        await self.overlay_oculto(timeout)
+        await self.red_inactiva(timeout=timeout)
+        await self.margen()
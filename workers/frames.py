@@ -0,0 +1,74 @@
+# workers/frames.py
+"""
+Caché por trabajador de los objetos Frame del frameset de ALERTRAN
+"""
+import asyncio
+import time
+
+# Ruta de nombres desde el frame principal de la página
+RUTAS_FRAMES = {
+    "menu": ("menu",),
+    "principal": ("menu", "principal"),
+    "filtro": ("menu", "principal", "filtro"),
+    "resultado": ("menu", "principal", "resultado"),
+    "contenido": ("menu", "principal", "contenido"),
+    "solapas": ("menu", "principal", "solapas"),
+}
+
+
+class CacheFrames:
+    """Resuelve cada frame una sola vez y lo invalida con framenavigated/framedetached"""
+
+    def __init__(self, page):
+        self.page = page
+        self.frames = {}
+
+        page.on("framenavigated", self._frame_navegado)
+        page.on("framedetached", self._frame_desconectado)
+
+    def _frame_navegado(self, frame):
+        # El Frame navegado sigue siendo válido; sus descendientes se recrean
+        for nombre, cacheado in list(self.frames.items()):
+            if cacheado is not frame and self._desciende_de(cacheado, frame):
+                del self.frames[nombre]
+
+    def _frame_desconectado(self, frame):
+        for nombre, cacheado in list(self.frames.items()):
+            if cacheado is frame:
+                del self.frames[nombre]
+
+    @staticmethod
+    def _desciende_de(frame, ancestro):
+        padre = frame.parent_frame
+        while padre is not None:
+            if padre is ancestro:
+                return True
+            padre = padre.parent_frame
+        return False
+
+    def _resolver(self, nombre):
+        actual = self.page.main_frame
+        for parte in RUTAS_FRAMES[nombre]:
+            actual = next((f for f in actual.child_frames if f.name == parte), None)
+            if actual is None:
+                return None
+        return actual
+
+    def invalidar(self):
+        self.frames.clear()
+
+    async def obtener(self, nombre, timeout=10000):
+        """Frame `nombre` vigente; espera a que se adjunte si aún no existe"""
+        frame = self.frames.get(nombre)
+        if frame is not None and not frame.is_detached():
+            return frame
+
+        limite = time.monotonic() + timeout / 1000
+        while True:
+            frame = self._resolver(nombre)
+            if frame is not None:
+                self.frames[nombre] = frame
+                return frame
+            if time.monotonic() >= limite:
+                raise TimeoutError(f"Frame '{nombre}' no disponible")
+            await asyncio.sleep(0.05)
@@ -0,0 +1,258 @@
+# workers/multiproceso.py
+"""
+Ejecución repartida en varios procesos del sistema: cada hijo tiene su propio driver de
+Playwright, su parte de las guías y de los navegadores, y devuelve eventos al proceso
+principal, que los re-emite por ProcesoSenales
+"""
+import asyncio
+import multiprocessing
+import queue
+import threading
+
+from config.settings import MAX_NAVEGADORES_AUTO, NAVEGADORES_PRESELECCION
+from utils.bitacora import Bitacora
+from workers.proceso_thread import ProcesoThread
+
+# Señales del hijo que se reenvían tal cual (progreso y estado se recalculan en el padre)
+SENALES_REENVIADAS = ("log", "guia_procesada")
+
+
+class ProcesoHijo(ProcesoThread):
+    """ProcesoThread que recibe su parte de las guías y entrega el resumen en lugar de guardarlo"""
+
+    def __init__(self, guias, cola_eventos, indice, **parametros):
+        super().__init__(**parametros)
+        self.guias_asignadas = guias
+        self.cola_eventos = cola_eventos
+        self.indice = indice
+        self.exitosas = 0
+
+    def leer_excel(self, ruta):
+        return self.guias_asignadas
+
+    def _abrir_bitacora(self, guias):
+        # El padre ya filtró/descartó la bitácora: el hijo solo registra
+        self.bitacora = Bitacora(
+            Bitacora.calcular_clave(self.excel_path, self.ciudad, self.tipo, self.ampliacion)
+        )
+        return guias
+
+    async def _actualizar_progreso(self, total_guias, resultados):
+        resultados['progreso'] += 1
+        self.exitosas = resultados['exitosas']
+        self.cola_eventos.put((self.indice, "progreso", (resultados['progreso'], resultados['exitosas'])))
+
+    async def _finalizar_proceso(self, exitosas):
+        # El resumen lo envía _ejecutar_hijo, también si el hijo terminó sin navegadores
+        self.exitosas = exitosas
+
+    def resumen(self):
+        self._consolidar_resultados()
+        return {
+            "exitosas": self.exitosas,
+            "buffers": self.buffers,
+            "estado_guias": self.estado_guias,
+            "duraciones": self.duraciones,
+            "tiempos_guia": self.tiempos_guia,
+            "ciclos": self.ciclos,
+            "muestras": self.tiempos.muestras,
+            "cuentas": self.estadisticas_cuentas,
+            "trazas": self.trazas.guardadas if self.trazas else 0,
+        }
+
+
+def _ejecutar_hijo(indice, guias, parametros, nav_inicial, limite_trazas, maximo_auto, cola_eventos, cancelar):
+    """Punto de entrada de cada proceso hijo"""
+    from PySide6.QtCore import QCoreApplication
+    app = QCoreApplication.instance() or QCoreApplication([])
+
+    hilo = ProcesoHijo(guias, cola_eventos, indice, **parametros)
+    hilo.nav_inicial = nav_inicial
+    if hilo.trazas:
+        hilo.trazas.limite = limite_trazas
+    if hilo.controlador:
+        hilo.controlador.maximo = maximo_auto
+
+    for nombre in SENALES_REENVIADAS:
+        getattr(hilo.senales, nombre).connect(
+            lambda *args, nombre=nombre: cola_eventos.put((indice, nombre, args))
+        )
+    hilo.senales.error.connect(lambda mensaje: cola_eventos.put((indice, "error", (mensaje,))))
+    hilo.senales.navegadores_activos.connect(
+        lambda cantidad: cola_eventos.put((indice, "navegadores_activos", (cantidad,)))
+    )
+
+    def vigilar_cancelacion():
+        cancelar.wait()
+        hilo.cancelar()
+
+    threading.Thread(target=vigilar_cancelacion, daemon=True).start()
+    try:
+        hilo.run()
+    finally:
+        cola_eventos.put((indice, "resumen", hilo.resumen()))
+        cola_eventos.put((indice, "fin", hilo.navegadores_activos))
+
+
+class PoolProcesos:
+    """Lanza los procesos hijos de un ProcesoThread y agrega sus eventos en él"""
+
+    def __init__(self, proceso, guias):
+        self.proceso = proceso
+        self.guias = guias
+        self.contexto = multiprocessing.get_context("spawn")
+        self.cola_eventos = self.contexto.Queue()
+        self.cancelar = self.contexto.Event()
+        self.procesos = []
+        self.partes = []
+        self.progreso = {}
+        self.activos = {}
+        self.terminados = set()
+        self.vistas = set()
+        self.exitosas = 0
+        self.navegadores_listos = 0
+
+    def _repartir(self):
+        """Navegadores y guías por hijo, proporcionales entre sí"""
+        num_procesos = self.proceso.num_procesos
+        total_navegadores = self.proceso.num_navegadores
+        base, resto = divmod(total_navegadores, num_procesos)
+        navegadores = [base + (1 if i < resto else 0) for i in range(num_procesos)]
+
+        partes, inicio = [], 0
+        for i, cantidad in enumerate(navegadores):
+            if i == num_procesos - 1:
+                fin = len(self.guias)
+            else:
+                fin = inicio + round(len(self.guias) * cantidad / total_navegadores)
+            partes.append((cantidad, self.guias[inicio:fin]))
+            inicio = fin
+        return partes
+
+    def _parametros(self, num_navegadores):
+        p = self.proceso
+        return {
+            "usuario": p.usuario, "password": p.password, "ciudad": p.ciudad, "tipo": p.tipo,
+            "ampliacion": p.ampliacion, "excel_path": p.excel_path, "num_navegadores": num_navegadores,
+            "navegador_compartido": p.navegador_compartido, "headless": p.headless,
+            "auto_navegadores": p.auto_navegadores, "preseleccion_ent": p.preseleccion_ent,
+            "peticiones_directas": p.peticiones_directas, "capturar_trazas": p.trazas is not None,
+            "cuentas_adicionales": p.cuentas[1:],
+        }
+
+    def _iniciar(self):
+        # Tramo de nav_idx reservado a cada hijo para que los [NavN] no se repitan
+        tramo = MAX_NAVEGADORES_AUTO if self.proceso.auto_navegadores else max(
+            cantidad for cantidad, _ in self.partes
+        ) + (NAVEGADORES_PRESELECCION if self.proceso.preseleccion_ent else 0)
+        limite_trazas = self.proceso.trazas.limite // len(self.partes) if self.proceso.trazas else 0
+        # El techo del modo automático es global: cada hijo recibe su parte
+        base, resto = divmod(MAX_NAVEGADORES_AUTO, len(self.partes))
+
+        for indice, (cantidad, guias) in enumerate(self.partes):
+            maximo_auto = max(cantidad, base + (1 if indice < resto else 0))
+            proceso = self.contexto.Process(
+                target=_ejecutar_hijo,
+                args=(indice, guias, self._parametros(cantidad), indice * tramo, limite_trazas,
+                      maximo_auto, self.cola_eventos, self.cancelar),
+                daemon=True,
+            )
+            proceso.start()
+            self.procesos.append(proceso)
+            self.proceso.senales.log.emit(
+                f"🧩 Proceso {indice + 1}: {cantidad} navegador(es), {len(guias)} guías (PID {proceso.pid})"
+            )
+
+    def _leer_evento(self):
+        try:
+            return self.cola_eventos.get(timeout=0.2)
+        except queue.Empty:
+            return None
+
+    async def ejecutar(self):
+        """Espera a todos los hijos re-emitiendo sus eventos; cancela si el padre se cancela"""
+        self.partes = [(cantidad, guias) for cantidad, guias in self._repartir() if cantidad and guias]
+        self._iniciar()
+        loop = asyncio.get_running_loop()
+
+        while len(self.terminados) < len(self.procesos):
+            if self.proceso.cancelado and not self.cancelar.is_set():
+                self.cancelar.set()
+
+            evento = await loop.run_in_executor(None, self._leer_evento)
+            if evento is None:
+                self._revisar_caidos()
+                continue
+            await self._atender(*evento)
+
+        for proceso in self.procesos:
+            proceso.join(timeout=10)
+
+    async def _atender(self, indice, tipo, datos):
+        senales = self.proceso.senales
+        if tipo in SENALES_REENVIADAS:
+            if tipo == "guia_procesada":
+                self.vistas.add(datos[0])
+            getattr(senales, tipo).emit(*datos)
+        elif tipo == "error":
+            senales.log.emit(f"🔴 [Proceso {indice + 1}] {datos[0]}")
+        elif tipo == "navegadores_activos":
+            self.activos[indice] = datos[0]
+            senales.navegadores_activos.emit(sum(self.activos.values()))
+        elif tipo == "progreso":
+            self.progreso[indice] = datos
+            await self._emitir_progreso()
+        elif tipo == "resumen":
+            self._incorporar(datos)
+        elif tipo == "fin":
+            self.terminados.add(indice)
+            self.navegadores_listos += datos
+
+    async def _emitir_progreso(self):
+        procesadas = sum(p for p, _ in self.progreso.values())
+        exitosas = sum(e for _, e in self.progreso.values())
+        total = self.proceso.total_guias
+        porcentaje = int(procesadas / total * 100)
+        self.proceso.senales.progreso.emit(porcentaje)
+        await self.proceso.calcular_tiempo_restante(procesadas, total)
+        self.proceso.senales.estado.emit(
+            f"Progreso: {procesadas}/{total} ({porcentaje}%) - Éxitos: {exitosas}"
+        )
+
+    def _incorporar(self, resumen):
+        """Une el resumen de un hijo a los resultados del ProcesoThread padre"""
+        p = self.proceso
+        self.exitosas += resumen["exitosas"]
+        for nav_idx, buffer in resumen["buffers"].items():
+            destino = p._buffer(nav_idx)
+            for clave, valores in buffer.items():
+                destino[clave].extend(valores)
+        p.estado_guias.update(resumen["estado_guias"])
+        p.duraciones.extend(resumen["duraciones"])
+        p.tiempos_guia.update(resumen["tiempos_guia"])
+        for modo, ciclos in resumen["ciclos"].items():
+            p.ciclos[modo].extend(ciclos)
+        p.tiempos.muestras.extend(resumen["muestras"])
+        for usuario, estadisticas in resumen["cuentas"].items():
+            for clave, valor in estadisticas.items():
+                p.estadisticas_cuentas[usuario][clave] += valor
+        if p.trazas:
+            p.trazas.guardadas += resumen["trazas"]
+
+    def _revisar_caidos(self):
+        """Un hijo que terminó sin avisar: sus guías sin resultado se registran como error"""
+        for indice, proceso in enumerate(self.procesos):
+            # Con código 0 el hijo envió "fin"; puede estar aún en la cola
+            if indice in self.terminados or proceso.is_alive() or proceso.exitcode == 0:
+                continue
+            self.terminados.add(indice)
+            _, guias = self.partes[indice]
+            pendientes = [g for g in guias if g not in self.vistas]
+            self.proceso.senales.log.emit(
+                f"💥 Proceso {indice + 1} terminó inesperadamente (código {proceso.exitcode}) - "
+                f"{len(pendientes)} guía(s) sin procesar"
+            )
+            for guia in pendientes:
+                self.proceso._buffer(0)['errores'].append(
+                    (guia, f"[Proceso {indice + 1}] Proceso terminado inesperadamente")
+                )
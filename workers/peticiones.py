@@ -0,0 +1,216 @@
+# workers/peticiones.py
+"""
+Motor de creación por peticiones directas (context.request) sobre la sesión del navegador
+"""
+from html.parser import HTMLParser
+from typing import Optional, Tuple
+from urllib.parse import urljoin
+
+from config.constants import ERRORES_BUSQUEDA, REGLAS_CREACION
+from workers.clasificador import clasificar
+
+
+class FlujoNoSoportado(Exception):
+    """El HTML recibido no permite continuar sin la interfaz (no se envió nada irreversible)"""
+
+
+class SesionCaducada(Exception):
+    """El servidor devolvió la pantalla de login"""
+
+
+class EnvioNoConfirmado(Exception):
+    """La creación se envió pero no hubo respuesta válida (red, proxy o 5xx): puede estar creada"""
+
+
+class _AnalizadorHTML(HTMLParser):
+    """Extrae formularios, enlaces, celdas y texto visible de un documento"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.formularios = []
+        self.enlaces = []
+        self.celdas = []
+        self.textos = []
+        self._formulario = None
+        self._enlace = None
+        self._celda = None
+        self._textarea = None
+        self._select = None
+        self._ignorar = 0
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {k: (v or "") for k, v in attrs}
+        if tag in ("script", "style"):
+            self._ignorar += 1
+        elif tag == "form":
+            self._formulario = {
+                "action": attrs.get("action", ""),
+                "method": attrs.get("method", "get").lower(),
+                "campos": [],
+                "botones": [],
+            }
+            self.formularios.append(self._formulario)
+        elif tag == "a":
+            self._enlace = [attrs.get("href", ""), ""]
+        elif tag in ("td", "th"):
+            self._celda = ""
+        elif self._formulario is not None and tag == "input" and attrs.get("name"):
+            tipo = attrs.get("type", "text").lower()
+            if tipo in ("submit", "button", "image"):
+                self._formulario["botones"].append((attrs["name"], attrs.get("value", "")))
+            elif tipo in ("checkbox", "radio"):
+                if "checked" in attrs:
+                    self._formulario["campos"].append([attrs["name"], attrs.get("value", "on")])
+            elif tipo not in ("reset", "file"):
+                self._formulario["campos"].append([attrs["name"], attrs.get("value", "")])
+        elif self._formulario is not None and tag == "textarea" and attrs.get("name"):
+            self._textarea = [attrs["name"], ""]
+            self._formulario["campos"].append(self._textarea)
+        elif self._formulario is not None and tag == "select" and attrs.get("name"):
+            self._select = [attrs["name"], None]
+            self._formulario["campos"].append(self._select)
+        elif self._select is not None and tag == "option":
+            valor = attrs.get("value", "")
+            if self._select[1] is None or "selected" in attrs:
+                self._select[1] = valor
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style"):
+            self._ignorar = max(0, self._ignorar - 1)
+        elif tag == "form":
+            self._formulario = None
+        elif tag == "a" and self._enlace is not None:
+            self.enlaces.append((self._enlace[0], self._enlace[1].strip()))
+            self._enlace = None
+        elif tag in ("td", "th") and self._celda is not None:
+            self.celdas.append(" ".join(self._celda.split()))
+            self._celda = None
+        elif tag == "textarea":
+            self._textarea = None
+        elif tag == "select" and self._select is not None:
+            if self._select[1] is None:
+                self._select[1] = ""
+            self._select = None
+
+    def handle_data(self, data):
+        if self._ignorar:
+            return
+        if self._textarea is not None:
+            self._textarea[1] += data
+            return
+        self.textos.append(data)
+        if self._enlace is not None:
+            self._enlace[1] += data
+        if self._celda is not None:
+            self._celda += data
+
+    @property
+    def texto(self) -> str:
+        return " ".join(" ".join(self.textos).split())
+
+
+def analizar(html: str) -> _AnalizadorHTML:
+    analizador = _AnalizadorHTML()
+    analizador.feed(html)
+    analizador.close()
+    return analizador
+
+
+class MotorPeticiones:
+    """Busca guías y crea incidencias enviando los formularios de 7.8 sin renderizarlos.
+
+    Las URLs y campos se leen del HTML que sirve ALERTRAN (frame filtro, enlace de la guía y
+    formulario de contenido), de modo que funciona contra cualquier servidor que sirva los
+    mismos formularios. Comparte las cookies del contexto del navegador."""
+
+    def __init__(self, request, url_filtro: str, html_filtro: str, timeout=15000):
+        self.request = request
+        self.timeout = timeout
+        self.url_filtro = url_filtro
+        self.formulario_busqueda = self._formulario_con(analizar(html_filtro), "nenvio")
+        if self.formulario_busqueda is None:
+            raise FlujoNoSoportado("Formulario de búsqueda no encontrado")
+
+    @classmethod
+    async def desde_frame(cls, context, filtro, timeout=15000):
+        """Construye el motor a partir del frame filtro ya cargado"""
+        return cls(context.request, filtro.url, await filtro.content(), timeout)
+
+    @staticmethod
+    def _formulario_con(documento, campo) -> Optional[dict]:
+        for formulario in documento.formularios:
+            if any(nombre == campo for nombre, _ in formulario["campos"]):
+                return formulario
+        return None
+
+    async def _enviar(self, formulario, base, valores, boton=None) -> Tuple[str, str]:
+        """Envía el formulario con `valores` sobre sus campos; devuelve (url, html)"""
+        campos = {nombre: valor for nombre, valor in formulario["campos"]}
+        campos.update(valores)
+        if boton is not None:
+            campos[boton[0]] = boton[1]
+        url = urljoin(base, formulario["action"] or base)
+
+        if formulario["method"] == "post":
+            respuesta = await self.request.post(url, form=campos, timeout=self.timeout)
+        else:
+            respuesta = await self.request.get(url, params=campos, timeout=self.timeout)
+        return await self._leer(respuesta)
+
+    async def _leer(self, respuesta) -> Tuple[str, str]:
+        html = await respuesta.text()
+        if 'name="j_username"' in html:
+            raise SesionCaducada("Sesión caducada")
+        if not respuesta.ok:
+            raise FlujoNoSoportado(f"HTTP {respuesta.status}")
+        return respuesta.url, html
+
+    async def buscar(self, guia: str) -> Tuple[str, Optional[str]]:
+        """Devuelve ("ENT" | "SIN_RESULTADOS" | "ENCONTRADA", url de la guía)"""
+        url, html = await self._enviar(self.formulario_busqueda, self.url_filtro, {"nenvio": guia})
+        documento = analizar(html)
+
+        if "ENT" in documento.celdas:
+            return "ENT", None
+
+        for href, texto in documento.enlaces:
+            if texto == guia and href and not href.lower().startswith("javascript:"):
+                return "ENCONTRADA", urljoin(url, href)
+
+        texto = documento.texto.lower()
+        if any(patron.lower() in texto for patron in ERRORES_BUSQUEDA):
+            return "SIN_RESULTADOS", None
+        raise FlujoNoSoportado("Enlace de la guía no encontrado")
+
+    async def crear(self, url_guia: str, tipo: str, origen: str,
+                    ampliacion: str) -> Tuple[Optional[bool], Optional[str]]:
+        """Envía el formulario de creación; devuelve (creada, patrón) como verificar_incidencia_creada.
+
+        (None, None) significa una respuesta 2xx que no encaja con ninguna regla; un fallo de
+        transporte o un 5xx tras el envío lanza EnvioNoConfirmado"""
+        respuesta = await self.request.get(url_guia, timeout=self.timeout)
+        url, html = await self._leer(respuesta)
+        documento = analizar(html)
+
+        formulario = self._formulario_con(documento, "tipo_incidencia_codigo")
+        if formulario is None:
+            raise FlujoNoSoportado("Formulario de creación no encontrado")
+        boton = next(
+            (b for b in formulario["botones"] if b[1].strip().lower() == "crear"), None
+        )
+
+        # A partir de aquí la petición puede haber creado la incidencia: no hay vuelta a la interfaz
+        try:
+            _, html = await self._enviar(formulario, url, {
+                "tipo_incidencia_codigo": tipo,
+                "tipo_origen_incidencia_codigo": origen,
+                "ampliacion_incidencia": ampliacion,
+            }, boton)
+        except SesionCaducada:
+            raise
+        except Exception as e:
+            # Un 5xx o un error del proxy puede llegar con la incidencia ya creada
+            raise EnvioNoConfirmado(str(e)) from e
+
+        return clasificar(analizar(html).texto, REGLAS_CREACION)
+
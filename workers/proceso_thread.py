@@ -3,8 +3,13 @@
 Thread principal para el procesamiento con múltiples navegadores
 """
 from PySide6.QtCore import QThread
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import asyncio
+import os
+import random
+import socket
+import sys
 import time
 from playwright.async_api import async_playwright
 from typing import List, Union
@@ -12,43 +17,126 @@ from pathlib import Path
 
 from models.signals import ProcesoSenales
 from utils.file_utils import FileUtils
+from utils.bitacora import Bitacora
+from config.constants import ERROR_MESSAGES, ERRORES_PERMANENTES, ERRORES_BUSQUEDA, REGLAS_CREACION
+from workers.esperas import EsperaPagina
+from workers.clasificador import recolectar_texto, clasificar
+from workers.concurrencia import ControladorConcurrencia
+from workers.sesion import CacheSesion
+from workers.frames import CacheFrames
+from workers.peticiones import MotorPeticiones, FlujoNoSoportado, SesionCaducada, EnvioNoConfirmado
+from workers.tiempos import RegistroTiempos
+from workers.trazas import CapturaTrazas
 from config.settings import (
-    MAX_REINTENTOS, TIEMPO_ESPERA_CLICK, TIEMPO_ESPERA_NAVEGACION,
-    TIEMPO_ESPERA_INGRESO_CODIGOS, TIEMPO_ESPERA_VOLVER, URL_ALERTRAN
+    MAX_REINTENTOS, TIEMPO_ESPERA_CARGA, TIEMPO_ESPERA_CLICK, TIEMPO_ESPERA_NAVEGACION,
+    TIEMPO_ESPERA_VOLVER, URL_ALERTRAN, NAVEGADOR_COMPARTIDO,
+    MODO_HEADLESS, BLOQUEAR_RECURSOS, URLS_BLOQUEADAS,
+    MAX_RECUPERACIONES, TIEMPO_ESPERA_RECUPERACION, REINTENTO_BASE, REINTENTO_MAX,
+    VENTANA_CONCURRENCIA_AUTO, REUTILIZAR_SESION, COMPARTIR_SESION,
+    SALTAR_VOLVER, NAVEGADORES_PRESELECCION, PETICIONES_DIRECTAS,
+    CAPTURA_TRAZAS, UMBRAL_TRAZA_LENTA, MOTOR_EN_LOOP_UI,
+    DURACION_ARRIENDO, RESERVA_ARRIENDO, ESPERA_ALMACEN
 )
 
+class PaginaNoActiva(Exception):
+    """La página del trabajador ya no sirve (cerrada, sesión caducada o frameset perdido)"""
+
+class GuiaReprogramada(Exception):
+    """Fallo transitorio: la guía volverá a la cola tras el backoff"""
+
 class ProcesoThread(QThread):
     """Thread principal para el procesamiento"""
     
-    def __init__(self, usuario, password, ciudad, tipo, ampliacion, excel_path, num_navegadores):
+    def __init__(self, usuario, password, ciudad, tipo, ampliacion, excel_path, num_navegadores,
+                 navegador_compartido=NAVEGADOR_COMPARTIDO, headless=MODO_HEADLESS, reanudar=False,
+                 auto_navegadores=False, preseleccion_ent=False,
+                 peticiones_directas=PETICIONES_DIRECTAS, capturar_trazas=CAPTURA_TRAZAS,
+                 cuentas_adicionales=None, num_procesos=1, almacen=None, lote=None):
         super().__init__()
         self.usuario = usuario
         self.password = password
+        # Cuentas de operador; los navegadores se reparten entre ellas en turno rotativo
+        self.cuentas = [(usuario, password)] + [
+            (u, p) for u, p in (cuentas_adicionales or []) if u != usuario
+        ]
+        self.estadisticas_cuentas = {
+            u: {"guias": 0, "errores": 0, "reintentos": 0} for u, _ in self.cuentas
+        }
         self.ciudad = ciudad
         self.tipo = tipo
         self.ampliacion = ampliacion
         self.excel_path = excel_path
-        self.num_navegadores = min(num_navegadores, 6)
+        # El tope lo aplica quien lanza el proceso (selector de la interfaz, cli.py): los procesos
+        # hijos reciben ya su parte y no deben volver a limitarla
+        self.num_navegadores = num_navegadores
+        self.num_procesos = max(1, min(num_procesos, self.num_navegadores))
+        self.nav_inicial = 0  # desplazamiento de nav_idx (procesos hijos)
+        self.auto_navegadores = auto_navegadores
+        self.controlador = ControladorConcurrencia() if auto_navegadores else None
+        self.preseleccion_ent = preseleccion_ent
+        self.peticiones_directas = peticiones_directas
+        self.navegador_compartido = navegador_compartido
+        self.headless = headless
+        self.reanudar = reanudar
+        self.bitacora = None
+        # Excel, bitácora y archivos de resultados: un único hilo mantiene el orden de las
+        # escrituras y la conexión SQLite en el mismo hilo, fuera del loop (que puede ser el de la UI)
+        self.executor_disco = ThreadPoolExecutor(max_workers=1, thread_name_prefix="disco")
+        # Modo coordinado: las guías se arriendan del almacén compartido en lugar de leer el Excel
+        self.almacen = almacen
+        self.lote = lote
+        self.instancia = f"{socket.gethostname()}-{os.getpid()}"
+        self.fichas = {}        # guía -> ficha del arriendo vigente
+        self.completando = set()  # escrituras de resultados en curso
+        self.sin_registrar = set()  # guías procesadas cuyo resultado aún no está en el almacén
+        self.alimentando = False
+        if almacen:
+            # Cada instancia es un único proceso; el pre-filtro vaciaría su cola antes de arrendar más
+            self.num_procesos = 1
+            self.preseleccion_ent = False
         self.senales = ProcesoSenales()
         
         # Estado del proceso
         self.guias_error = []
         self.guias_advertencia = []
         self.guias_ent = []
-        self.guias_procesadas_exito = set()
-        self.guias_procesadas_ent = set()
-        self.guias_en_error = set()
+        self.estado_guias = {}  # guía -> "EXITO" | "ENT" | "ERROR"
+        self.buffers = {}       # nav_idx -> resultados locales del trabajador
         
         # Recursos
         self.pages = []
         self.browsers = []
+        self.navegadores_propios = {}  # nav_idx -> Chromium del trabajador (sin navegador compartido)
         self.contexts = []
-        self.lock = asyncio.Lock()
-        self.cola_guias = []
+        self.esperas = {}
+        self.cache_frames = {}
+        self.motores = {}       # nav_idx -> MotorPeticiones (None si el flujo no lo admite)
+        self.ultimo_modo = {}   # nav_idx -> "directo" | "volver" (cómo terminó la última guía)
+        self.modo_guia = {}     # nav_idx -> modo de la guía en curso (para las métricas)
+        self.duraciones = []    # segundos por intento (control automático)
+        self.inicio_guias = {}  # guía -> inicio del primer intento
+        self.tiempos_guia = {}  # guía -> segundos de principio a fin, con reintentos (métricas)
+        self.tiempos = RegistroTiempos()
+        self.trazas = CapturaTrazas() if capturar_trazas else None
+        self.ciclos = {"directo": [], "volver": []}
+        self.lock_navegador = asyncio.Lock()
+        self.locks_login = {}   # clave de sesión -> lock (un login a la vez por snapshot)
+        self.cola_guias = None
+        self.playwright = None
+        self.guias_encoladas = set()
+        self.reintentos_programados = {}  # guía -> (TimerHandle, item) mientras dura el backoff
+        self.navegadores_activos = 0
+        self.trabajadores = set()        # nav_idx procesando guías
+        self.navegadores_a_detener = set()
+        self.tareas_trabajadores = []
+        self.cola_preseleccion = None
+        self.preseleccion_activa = 0
+        self.tareas_preseleccion = []
         
         # Control
         self.procesando = True
         self.cancelado = False
+        self.tarea = None  # tarea en el loop de la interfaz (modo sin QThread)
         self.tiempo_inicio = None
         self.total_guias = 0
         self.carpeta_descargas = FileUtils.obtener_carpeta_descargas()
@@ -58,13 +146,48 @@ class ProcesoThread(QThread):
         """Lee el archivo Excel y extrae las guías"""
         return self.file_utils.leer_guias_excel(Path(ruta))
 
+    def _espera(self, page) -> EsperaPagina:
+        """Obtiene (o crea) el rastreador de esperas de la página"""
+        espera = self.esperas.get(page)
+        if espera is None:
+            espera = EsperaPagina(page)
+            self.esperas[page] = espera
+        return espera
+
     async def esperar_overlay(self, page, timeout=10000):
-        """Espera a que desaparezca el overlay"""
+        """Espera a que desaparezca el overlay y se estabilice la red"""
+        await self._espera(page).pagina_lista(timeout)
+
+    def _frames(self, page) -> CacheFrames:
+        """Obtiene (o crea) la caché de frames de la página"""
+        frames = self.cache_frames.get(page)
+        if frames is None:
+            frames = CacheFrames(page)
+            self.cache_frames[page] = frames
+        return frames
+
+    async def _frame_cargado(self, page, nombre, timeout=TIEMPO_ESPERA_CARGA):
+        """Devuelve el Frame `nombre` una vez terminada su carga"""
+        frame = await self._frames(page).obtener(nombre, timeout)
         try:
-            await page.wait_for_selector("#capa_selector", state="hidden", timeout=timeout)
+            await frame.wait_for_load_state("load", timeout=timeout)
         except:
             pass
-        await asyncio.sleep(1.5)
+        return frame
+
+    async def _campo_busqueda(self, page, timeout=15000):
+        """Localiza el campo de búsqueda de guía del frame filtro"""
+        filtro = await self._frames(page).obtener("filtro", timeout)
+        return filtro.locator('input[name="nenvio"]:not([type="hidden"])')
+
+    async def esperar_busqueda_lista(self, page, timeout=15000):
+        """Espera a que el campo de búsqueda de guía esté habilitado"""
+        try:
+            envio = await self._campo_busqueda(page, timeout)
+            await self._espera(page).campo_habilitado(envio, timeout)
+            return True
+        except:
+            return False
 
     async def verificar_pagina_activa(self, page):
         """Verifica si la página está activa"""
@@ -77,13 +200,8 @@ class ProcesoThread(QThread):
     async def verificar_estado_ent(self, page, nav_idx):
         """Verifica si la guía tiene estado ENT"""
         try:
-            elemento_ent = (
-                page
-                .frame_locator("frame[name=\"menu\"]")
-                .frame_locator("iframe[name=\"principal\"]")
-                .frame_locator("frame[name=\"resultado\"]")
-                .get_by_role("cell", name="ENT", exact=True)
-            )
+            resultado = await self._frames(page).obtener("resultado")
+            elemento_ent = resultado.get_by_role("cell", name="ENT", exact=True)
             
             if await elemento_ent.count() > 0:
                 self.senales.log.emit(f"📦 [Nav{nav_idx}] Estado ENT detectado")
@@ -103,17 +221,26 @@ class ProcesoThread(QThread):
                 tiempo_restante = str(timedelta(seconds=int(segundos_restantes)))
                 self.senales.tiempo_restante.emit(f"⏱️ Tiempo restante: {tiempo_restante}")
 
+    def _cuenta(self, nav_idx):
+        """Cuenta (usuario, contraseña) asignada al navegador"""
+        return self.cuentas[(nav_idx - 1) % len(self.cuentas)]
+
+    def _clave_sesion(self, nav_idx):
+        """Snapshot de la cuenta compartido por sus trabajadores (COMPARTIR_SESION) o propio
+        de cada trabajador, que solo lo reutiliza al recuperarse o en la siguiente ejecución"""
+        usuario = self._cuenta(nav_idx)[0]
+        return usuario if COMPARTIR_SESION else f"{usuario}#Nav{nav_idx}"
+
     async def hacer_login(self, page, nav_idx):
         """Realiza el login en ALERTRAN"""
         try:
-            self.senales.log.emit(f"🔐 [Nav{nav_idx}] Iniciando sesión...")
-            await page.fill('input[name="j_username"]', self.usuario)
-            await asyncio.sleep(0.2)
-            await page.fill('input[name="j_password"]', self.password)
-            await asyncio.sleep(0.2)
+            usuario, password = self._cuenta(nav_idx)
+            self.senales.log.emit(f"🔐 [Nav{nav_idx}] Iniciando sesión ({usuario})...")
+            await page.fill('input[name="j_username"]', usuario)
+            await page.fill('input[name="j_password"]', password)
             await page.get_by_role("button", name="Aceptar").click()
             await page.wait_for_load_state("networkidle")
-            await asyncio.sleep(1)
+            await self._espera(page).frame_cargado("menu", TIEMPO_ESPERA_CARGA)
             return True
         except Exception as e:
             self.senales.log.emit(f"❌ [Nav{nav_idx}] Error login: {str(e)}")
@@ -127,7 +254,7 @@ class ProcesoThread(QThread):
             if not await self.verificar_pagina_activa(page):
                 return False
             
-            menu = page.frame_locator('frame[name="menu"]')
+            menu = await self._frames(page).obtener("menu")
             
             try:
                 base_selector = menu.get_by_role("cell", name="ABA BARRANQUILLA AEROPUE").locator("span")
@@ -140,20 +267,19 @@ class ProcesoThread(QThread):
                 ciudad_selector = menu.get_by_role("list").get_by_text(self.ciudad)
                 if await ciudad_selector.count() > 0:
                     await ciudad_selector.click(timeout=2000)
-                    await asyncio.sleep(TIEMPO_ESPERA_CLICK * 2 / 1000)
+                    await self._espera(page).red_inactiva()
             except:
                 pass
 
             funcionalidad = menu.locator('input[name="funcionalidad_codigo"]:not([type="hidden"])')
-            await funcionalidad.wait_for(state="visible", timeout=20000)
+            await self._espera(page).campo_habilitado(funcionalidad, timeout=20000)
             await funcionalidad.fill("")
-            await asyncio.sleep(0.2)
             await funcionalidad.fill("7.8")
-            await asyncio.sleep(0.2)
             await funcionalidad.press("Enter")
 
             await self.esperar_overlay(page)
-            await asyncio.sleep(TIEMPO_ESPERA_NAVEGACION / 1000)
+            if not await self.esperar_busqueda_lista(page, TIEMPO_ESPERA_CARGA + TIEMPO_ESPERA_NAVEGACION):
+                self.senales.log.emit(f"⚠️ [Nav{nav_idx}] Campo de búsqueda aún no disponible")
             
             self.senales.log.emit(f"✅ [Nav{nav_idx}] Navegación completada")
             return True
@@ -162,46 +288,90 @@ class ProcesoThread(QThread):
             self.senales.log.emit(f"❌ [Nav{nav_idx}] Error navegación: {str(e)}")
             return False
 
-    async def ingresar_codigos(self, contenido, tipo, origen, nav_idx):
+    async def ingresar_codigos(self, page, contenido, tipo, origen, nav_idx):
         """Ingresa los códigos de tipo y origen"""
         try:
+            espera = self._espera(page)
+
             tipo_input = contenido.locator('input[name="tipo_incidencia_codigo"]:not([type="hidden"])')
-            await tipo_input.wait_for(state="visible", timeout=10000)
+            await espera.campo_habilitado(tipo_input, timeout=10000)
             await tipo_input.fill("")
             await tipo_input.fill(tipo)
             await tipo_input.press("Enter")
+            await espera.red_inactiva()
 
             origen_input = contenido.locator('input[name="tipo_origen_incidencia_codigo"]:not([type="hidden"])')
-            await origen_input.wait_for(state="visible", timeout=10000)
+            await espera.campo_habilitado(origen_input, timeout=10000)
             await origen_input.fill("")
-            await asyncio.sleep(TIEMPO_ESPERA_INGRESO_CODIGOS / 1000)
             await origen_input.fill(origen)
-            await asyncio.sleep(TIEMPO_ESPERA_INGRESO_CODIGOS / 1000)
             await origen_input.press("Enter")
-            await asyncio.sleep(TIEMPO_ESPERA_CLICK / 1000)
+            await espera.red_inactiva()
+            await espera.margen()
 
             return True
         except Exception as e:
             self.senales.log.emit(f"⚠️ [Nav{nav_idx}] Error códigos: {str(e)}")
             return False
 
-    async def manejar_boton_volver(self, solapas, guia, nav_idx):
+    async def _busqueda_utilizable(self, page):
+        """Comprueba, sin esperar, si el campo de búsqueda sigue operativo"""
+        try:
+            envio = await self._campo_busqueda(page, timeout=0)
+            return await envio.is_visible() and await envio.is_editable(timeout=500)
+        except:
+            return False
+
+    async def _saltar_volver(self, page, nav_idx):
+        """Modo rápido: evita Volver si el frame filtro permite buscar la siguiente guía"""
+        if SALTAR_VOLVER and await self._busqueda_utilizable(page):
+            self.ultimo_modo[nav_idx] = self.modo_guia[nav_idx] = "directo"
+            self.senales.log.emit(f"⏩ [Nav{nav_idx}] Búsqueda disponible - sin Volver")
+            return True
+        self.ultimo_modo[nav_idx] = self.modo_guia[nav_idx] = "volver"
+        return False
+
+    def _esperar_navegacion_frame(self, page, nav_idx, nombre):
+        """Tras un ciclo sin Volver, el frame `nombre` aún muestra la guía anterior:
+        devuelve una tarea que termina cuando navegue (None si no hace falta)"""
+        if self.ultimo_modo.get(nav_idx) != "directo":
+            return None
+        return asyncio.ensure_future(page.wait_for_event(
+            "framenavigated", predicate=lambda f: f.name == nombre, timeout=TIEMPO_ESPERA_CARGA
+        ))
+
+    async def _confirmar_navegacion(self, tarea, accion_ok=True):
+        """Espera (o cancela si la acción falló) la tarea de _esperar_navegacion_frame"""
+        if tarea is None:
+            return
+        if not accion_ok:
+            tarea.cancel()
+            return
+        try:
+            await tarea
+        except Exception:
+            pass
+
+    async def manejar_boton_volver(self, page, guia, nav_idx):
         """Maneja el botón Volver"""
+        if await self._saltar_volver(page, nav_idx):
+            return True
         try:
             self.senales.log.emit(f"⏎ [Nav{nav_idx}] Clic en Volver...")
-            await asyncio.sleep(2)
             
+            solapas = await self._frames(page).obtener("solapas")
             boton_volver = solapas.get_by_role("button", name="Volver")
-            
-            if await boton_volver.count() == 0:
+            try:
+                await boton_volver.wait_for(state="visible", timeout=TIEMPO_ESPERA_VOLVER)
+            except:
                 self.senales.log.emit(f"⚠️ [Nav{nav_idx}] Botón Volver no encontrado")
                 return False
             
             await boton_volver.click(timeout=TIEMPO_ESPERA_VOLVER)
-            await self.esperar_overlay(self.pages[nav_idx - 1])
-            await asyncio.sleep(3)
+            await self.esperar_overlay(page)
             
-            return await self.verificar_pagina_activa(self.pages[nav_idx - 1])
+            if not await self.esperar_busqueda_lista(page):
+                return False
+            return await self.verificar_pagina_activa(page)
             
         except Exception as e:
             self.senales.log.emit(f"⚠️ [Nav{nav_idx}] Error Volver: {str(e)}")
@@ -210,29 +380,22 @@ class ProcesoThread(QThread):
     async def verificar_incidencia_creada(self, page, nav_idx, guia):
         """Verifica si la incidencia se creó correctamente"""
         try:
-            await asyncio.sleep(3)
-            
-            mensajes_exito = [
-                "Incidencia creada", "Éxito", "Success", 
-                "Creado correctamente", "Operación exitosa"
-            ]
+            await self._espera(page).red_inactiva()
             
-            for mensaje in mensajes_exito:
-                if await page.get_by_text(mensaje, exact=False).count() > 0:
-                    self.senales.log.emit(f"✅ [Nav{nav_idx}] Incidencia creada exitosamente")
-                    return True
-            
-            mensajes_error = [
-                "Error", "Falló", "No se pudo crear", 
-                "Exception", "No fue posible", "Reintente"
-            ]
+            # Los mensajes pueden pintarse un instante después de estabilizarse la red
+            limite = time.monotonic() + TIEMPO_ESPERA_CLICK / 1000
+            while True:
+                texto = await recolectar_texto(page)
+                resultado, patron = clasificar(texto, REGLAS_CREACION)
+                if resultado is not None or time.monotonic() >= limite:
+                    break
+                await asyncio.sleep(0.25)
             
-            for mensaje in mensajes_error:
-                if await page.get_by_text(mensaje, exact=False).count() > 0:
-                    self.senales.log.emit(f"❌ [Nav{nav_idx}] Error detectado: {mensaje}")
-                    return False
-            
-            return None
+            if resultado is True:
+                self.senales.log.emit(f"✅ [Nav{nav_idx}] Incidencia creada exitosamente")
+            elif resultado is False:
+                self.senales.log.emit(f"❌ [Nav{nav_idx}] Error detectado: {patron}")
+            return resultado
             
         except Exception as e:
             self.senales.log.emit(f"⚠️ [Nav{nav_idx}] Error en verificación: {str(e)}")
@@ -240,8 +403,7 @@ class ProcesoThread(QThread):
 
     async def detectar_error_guia(self, page):
         """Detecta si hay error en la guía"""
-        errores = ["No se encontraron", "Error", "No existe", "sin resultados"]
-        for texto in errores:
+        for texto in ERRORES_BUSQUEDA:
             try:
                 if await page.get_by_text(texto, exact=False).count() > 0:
                     return True
@@ -249,33 +411,209 @@ class ProcesoThread(QThread):
                 pass
         return False
 
-    async def _registrar_error(self, guia, error_msg, nav_idx):
-        """Registra un error en la lista"""
-        async with self.lock:
-            self.guias_error.append((guia, f"[Nav{nav_idx}] {error_msg}"))
-            self.guias_en_error.add(guia)
+    def _buffer(self, nav_idx):
+        """Resultados locales del trabajador (se consolidan al finalizar)"""
+        buffer = self.buffers.get(nav_idx)
+        if buffer is None:
+            buffer = {'errores': [], 'advertencias': [], 'ent': []}
+            self.buffers[nav_idx] = buffer
+        return buffer
+
+    def _consolidar_resultados(self):
+        """Une los resultados de todos los trabajadores"""
+        self.guias_error = []
+        self.guias_advertencia = []
+        self.guias_ent = []
+        for nav_idx in sorted(self.buffers):
+            buffer = self.buffers[nav_idx]
+            self.guias_error.extend(buffer['errores'])
+            self.guias_advertencia.extend(buffer['advertencias'])
+            self.guias_ent.extend(buffer['ent'])
+
+    def _encolar(self, guias, cola):
+        """Encola las guías descartando duplicados; devuelve cuántas se encolaron"""
+        encoladas = 0
+        for guia in guias:
+            if guia in self.guias_encoladas:
+                continue
+            self.guias_encoladas.add(guia)
+            cola.put_nowait((guia, 1, None))
+            encoladas += 1
+        return encoladas
+
+    async def _siguiente_guia(self, nav_idx):
+        """Toma la siguiente guía de la cola; espera mientras queden reintentos programados"""
+        while self.procesando and not self.cancelado:
+            try:
+                guia, intento, nav_previo = self.cola_guias.get_nowait()
+            except asyncio.QueueEmpty:
+                if not self.reintentos_programados and self.preseleccion_activa == 0 and not self.alimentando:
+                    return None
+                await asyncio.sleep(0.2)
+                continue
+            
+            if nav_previo == nav_idx and not self.cola_guias.empty():
+                # Reintento que falló en este navegador: se cede a otro (una sola vez)
+                self.cola_guias.put_nowait((guia, intento, None))
+                continue
+            
+            if self.almacen and guia not in self.fichas:
+                # El arriendo caducó y la guía pasó a otra instancia
+                continue
+            
+            return guia, intento
+        return None
+
+    def _es_permanente(self, error_msg):
+        """Indica si el error no se soluciona reintentando"""
+        return any(patron in error_msg for patron in ERRORES_PERMANENTES)
+
+    def _liberar_reintento(self, item):
+        """Devuelve a la cola una guía cuyo backoff terminó"""
+        self.reintentos_programados.pop(item[0], None)
+        if not self.cancelado:
+            self.cola_guias.put_nowait(item)
+
+    def _programar_reintento(self, guia, intento, nav_idx):
+        """Programa la guía para el intento `intento` con backoff exponencial y jitter"""
+        espera_ms = min(REINTENTO_BASE * 2 ** (intento - 2), REINTENTO_MAX)
+        espera = espera_ms / 1000 * random.uniform(0.5, 1.5)
+        item = (guia, intento, nav_idx)
+        handle = asyncio.get_running_loop().call_later(espera, self._liberar_reintento, item)
+        self.reintentos_programados[guia] = (handle, item)
+        return espera
+
+    def _cancelar_reintentos(self):
+        """Anula los backoff en curso al terminar los trabajadores; sin cancelación, las guías
+        vuelven a la cola para que _drenar_cola las registre en lugar de perderse"""
+        for handle, item in self.reintentos_programados.values():
+            handle.cancel()
+            if not self.cancelado:
+                self.cola_guias.put_nowait(item)
+        self.reintentos_programados.clear()
+
+    async def _fallo_guia(self, guia, error_msg, nav_idx, intento):
+        """Registra un fallo definitivo (devuelve False) o reprograma la guía si es transitorio"""
+        if self.cancelado:
+            # Interrumpida por la cancelación, no fallida: queda pendiente para reanudar
+            await self._registrar_error(guia, error_msg, nav_idx, definitivo=False)
+            return False
+        if intento >= MAX_REINTENTOS or self._es_permanente(error_msg):
+            await self._registrar_error(guia, error_msg, nav_idx)
+            return False
+        
+        espera = self._programar_reintento(guia, intento + 1, nav_idx)
+        if nav_idx:
+            self.estadisticas_cuentas[self._cuenta(nav_idx)[0]]["reintentos"] += 1
+        raise GuiaReprogramada(
+            f"{error_msg} - reintento {intento + 1}/{MAX_REINTENTOS} en {espera:.1f}s"
+        )
+
+    def _registrar_en_bitacora(self, guia, estado, detalle, nav_idx):
+        """Persiste el resultado de la guía para poder reanudar y lo suma a su cuenta"""
+        if nav_idx:
+            estadisticas = self.estadisticas_cuentas[self._cuenta(nav_idx)[0]]
+            estadisticas["guias"] += 1
+            if estado == "ERROR":
+                estadisticas["errores"] += 1
+        if self.bitacora:
+            escritura = asyncio.get_running_loop().run_in_executor(
+                self.executor_disco, self.bitacora.registrar, guia, estado, detalle, f"Nav{nav_idx}"
+            )
+            escritura.add_done_callback(lambda t: self._escrito_en_bitacora(t, nav_idx))
+        if self.almacen:
+            self._completar_en_almacen(guia, estado, detalle, nav_idx)
+
+    def _escrito_en_bitacora(self, tarea, nav_idx):
+        if tarea.exception():
+            self.senales.log.emit(f"⚠️ [Nav{nav_idx}] No se pudo escribir la bitácora: {str(tarea.exception())}")
+
+    def _completar_en_almacen(self, guia, estado, detalle, nav_idx):
+        """Cierra la guía en el almacén compartido (en segundo plano, con reintentos)"""
+        ficha = self.fichas.get(guia)
+        if ficha is None:
+            self.senales.log.emit(
+                f"⚠️ [Nav{nav_idx}] {guia} - el arriendo ya no era de esta instancia; "
+                f"el resultado no se registró en el almacén"
+            )
+            return
+        self.sin_registrar.add(guia)
+        tarea = asyncio.ensure_future(self._completar_con_reintentos(guia, ficha, estado, detalle, nav_idx))
+        self.completando.add(tarea)
+        tarea.add_done_callback(self.completando.discard)
+
+    async def _completar_con_reintentos(self, guia, ficha, estado, detalle, nav_idx):
+        """Escribe el resultado desde el executor (la ruta puede ser de red y el lock lo puede tener
+        otra instancia). La ficha se conserva, y el arriendo se sigue renovando, hasta que la
+        escritura se confirma; los reintentos se limitan a medio arriendo para no sobrepasarlo."""
+        loop = asyncio.get_running_loop()
+        limite = time.monotonic() + DURACION_ARRIENDO / 2
+        espera = 1
+        while True:
+            try:
+                completada = await loop.run_in_executor(
+                    None, self.almacen.completar, self.lote, guia, ficha, estado, detalle
+                )
+                break
+            except Exception as e:
+                if time.monotonic() + espera > limite:
+                    # Queda ASIGNADA (no se libera): solo volverá a procesarse si el arriendo caduca
+                    self.senales.log.emit(
+                        f"⛔ [Nav{nav_idx}] {guia} - resultado {estado} no registrado en el almacén: {str(e)}"
+                    )
+                    return
+                self.senales.log.emit(
+                    f"⚠️ [Nav{nav_idx}] No se pudo escribir en el almacén: {str(e)} - reintento en {espera}s"
+                )
+                await asyncio.sleep(espera)
+                espera = min(espera * 2, 30)
+        
+        self.sin_registrar.discard(guia)
+        if self.fichas.get(guia) == ficha:
+            del self.fichas[guia]
+        if not completada:
+            self.senales.log.emit(
+                f"⚠️ [Nav{nav_idx}] {guia} - el arriendo ya no era de esta instancia; "
+                f"el resultado no se registró en el almacén"
+            )
+
+    async def _registrar_error(self, guia, error_msg, nav_idx, definitivo=True):
+        """Registra un error en la lista; si no es `definitivo` (guía nunca intentada o
+        interrumpida al cancelar) no pasa a la bitácora y se vuelve a encolar al reanudar"""
+        self._buffer(nav_idx)['errores'].append((guia, f"[Nav{nav_idx}] {error_msg}"))
+        self.estado_guias[guia] = "ERROR"
+        if definitivo:
+            self._registrar_en_bitacora(guia, "ERROR", error_msg, nav_idx)
         fecha = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         self.senales.guia_procesada.emit(
             guia, "❌ ERROR", error_msg, f"Nav{nav_idx}", fecha
         )
 
-    async def _manejar_ent(self, guia, nav_idx, solapas):
-        """Maneja el caso de guía ENT"""
+    def _registrar_ent(self, guia, nav_idx):
+        """Registra una guía entregada (ENT) en resultados, bitácora e historial"""
         mensaje = f"📦 [Nav{nav_idx}] {guia} - GUÍA ENTREGADA (ENT)"
         self.senales.log.emit(mensaje)
-        async with self.lock:
-            self.guias_ent.append(guia)
-            self.guias_procesadas_ent.add(guia)
+        self._buffer(nav_idx)['ent'].append(guia)
+        self.estado_guias[guia] = "ENT"
+        self._registrar_en_bitacora(guia, "ENT", "ENT", nav_idx)
         
         fecha = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         self.senales.guia_procesada.emit(guia, "📦 ENTREGADA", "ENT", f"Nav{nav_idx}", fecha)
+
+    async def _manejar_ent(self, page, guia, nav_idx):
+        """Maneja el caso de guía ENT"""
+        self._registrar_ent(guia, nav_idx)
+        
+        if await self._saltar_volver(page, nav_idx):
+            return True
         
         try:
+            solapas = await self._frames(page).obtener("solapas")
             boton_volver = solapas.get_by_role("button", name="Volver")
             if await boton_volver.count() > 0:
                 await boton_volver.click(timeout=10000)
-                await self.esperar_overlay(self.pages[nav_idx - 1])
-                await asyncio.sleep(2)
+                await self.esperar_overlay(page)
+                await self.esperar_busqueda_lista(page)
         except:
             pass
         
@@ -286,216 +624,702 @@ class ProcesoThread(QThread):
         fecha = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
         if incidencia_creada is True and exito_volver:
-            async with self.lock:
-                self.guias_procesadas_exito.add(guia)
+            self.estado_guias[guia] = "EXITO"
+            self._registrar_en_bitacora(guia, "EXITO", "COMPLETADO", nav_idx)
             self.senales.guia_procesada.emit(
                 guia, "✅ PROCESADA", "COMPLETADO", f"Nav{nav_idx}", fecha
             )
             self.senales.log.emit(f"✅ [Nav{nav_idx}] {guia} OK")
             return True
         elif incidencia_creada is None:
-            async with self.lock:
-                self.guias_advertencia.append((guia, f"[Nav{nav_idx}] Estado indeterminado"))
+            self._buffer(nav_idx)['advertencias'].append((guia, f"[Nav{nav_idx}] Estado indeterminado"))
+            self._registrar_en_bitacora(guia, "ADVERTENCIA", "NO CONFIRMADO", nav_idx)
             self.senales.guia_procesada.emit(
                 guia, "⚠️ ADVERTENCIA", "NO CONFIRMADO", f"Nav{nav_idx}", fecha
             )
             return True
         else:
-            error_msg = "Error en procesamiento"
-            if not incidencia_creada:
-                error_msg = "Incidencia no creada"
-            if not exito_volver:
-                error_msg = "Error al volver"
-            
-            await self._registrar_error(guia, error_msg, nav_idx)
-            
-            if intento < MAX_REINTENTOS and not incidencia_creada:
-                return False
-            return True
+            # Si la incidencia se creó, un fallo al volver no debe reintentarse (duplicaría)
+            error_msg = "Incidencia no creada" if not incidencia_creada else "Error al volver"
+            return await self._fallo_guia(guia, error_msg, nav_idx, intento)
 
     async def _ejecutar_creacion(self, page, guia, nav_idx, contenido):
         """Ejecuta la creación de la incidencia"""
         try:
-            async with page.expect_popup(timeout=10000) as pop_info:
-                await contenido.get_by_role("button", name="Crear").click()
-            popup = await pop_info.value
-            await popup.close()
-            await asyncio.sleep(2)
+            with self.tiempos.medir("creacion", nav_idx):
+                async with page.expect_popup(timeout=10000) as pop_info:
+                    await contenido.get_by_role("button", name="Crear").click()
+                popup = await pop_info.value
+                await popup.close()
+                await self._espera(page).red_inactiva()
             self.senales.log.emit(f"✅ [Nav{nav_idx}] Popup cerrado correctamente")
             return True
         except Exception as e:
             self.senales.log.emit(f"⚠️ [Nav{nav_idx}] Timeout/Error en creación - {str(e)}")
-            return await self.verificar_incidencia_creada(page, nav_idx, guia)
+            with self.tiempos.medir("verificacion", nav_idx):
+                return await self.verificar_incidencia_creada(page, nav_idx, guia)
 
-    async def _procesar_creacion_incidencia(self, page, guia, nav_idx, resultado, contenido, solapas, intento):
+    async def _procesar_creacion_incidencia(self, page, guia, nav_idx, intento):
         """Procesa la creación de la incidencia"""
         if await self.detectar_error_guia(page):
             error_msg = "Guía sin resultados"
-            await self._registrar_error(guia, error_msg, nav_idx)
+            await self._fallo_guia(guia, error_msg, nav_idx, intento)
             raise Exception(error_msg)
 
-        try:
-            await resultado.get_by_role("link", name=guia).click(timeout=10000)
-        except Exception as e:
-            error_msg = f"No se pudo abrir la guía: {str(e)}"
-            await self._registrar_error(guia, error_msg, nav_idx)
-            raise Exception(error_msg)
+        navegacion = self._esperar_navegacion_frame(page, nav_idx, "contenido")
+        with self.tiempos.medir("abrir_guia", nav_idx):
+            try:
+                resultado = await self._frames(page).obtener("resultado")
+                await resultado.get_by_role("link", name=guia).click(timeout=10000)
+                await self._confirmar_navegacion(navegacion)
+            except Exception as e:
+                await self._confirmar_navegacion(navegacion, accion_ok=False)
+                error_msg = f"No se pudo abrir la guía: {str(e)}"
+                await self._fallo_guia(guia, error_msg, nav_idx, intento)
+                raise Exception(error_msg)
 
-        await self.esperar_overlay(page)
-        await asyncio.sleep(TIEMPO_ESPERA_CLICK / 1000)
+            await self.esperar_overlay(page)
+            contenido = await self._frame_cargado(page, "contenido")
 
-        if not await self.ingresar_codigos(contenido, self.tipo, "018", nav_idx):
+        with self.tiempos.medir("codigos", nav_idx):
+            codigos_ok = await self.ingresar_codigos(page, contenido, self.tipo, "018", nav_idx)
+        if not codigos_ok:
             error_msg = "Error ingresando códigos"
-            await self._registrar_error(guia, error_msg, nav_idx)
+            await self._fallo_guia(guia, error_msg, nav_idx, intento)
             raise Exception(error_msg)
 
+        contenido = await self._frames(page).obtener("contenido")
         await contenido.locator('textarea[name="ampliacion_incidencia"]').fill(self.ampliacion)
 
         resultado_creacion = await self._ejecutar_creacion(page, guia, nav_idx, contenido)
-        exito_volver = await self.manejar_boton_volver(solapas, guia, nav_idx)
+        with self.tiempos.medir("volver", nav_idx):
+            exito_volver = await self.manejar_boton_volver(page, guia, nav_idx)
         
         return await self._evaluar_resultado(
             guia, nav_idx, resultado_creacion, exito_volver, intento
         )
 
+    async def _buscar_guia(self, page, guia, nav_idx):
+        """Busca la guía en el frame filtro y espera el frame resultado"""
+        if not await self.verificar_pagina_activa(page):
+            raise PaginaNoActiva("Página no activa")
+        
+        with self.tiempos.medir("busqueda", nav_idx):
+            navegacion = self._esperar_navegacion_frame(page, nav_idx, "resultado")
+            try:
+                envio = await self._campo_busqueda(page)
+                await self._espera(page).campo_habilitado(envio, timeout=15000)
+                await envio.fill("")
+                await envio.fill(guia)
+                await envio.press("Enter")
+                await self._confirmar_navegacion(navegacion)
+            except Exception as e:
+                await self._confirmar_navegacion(navegacion, accion_ok=False)
+                raise PaginaNoActiva(f"Campo búsqueda no disponible: {str(e)}")
+
+            await self.esperar_overlay(page)
+            await self._frame_cargado(page, "resultado")
+
+    async def _motor_peticiones(self, page, nav_idx):
+        """Motor de peticiones directas del trabajador, construido desde su frame filtro"""
+        if nav_idx not in self.motores:
+            try:
+                filtro = await self._frames(page).obtener("filtro")
+                self.motores[nav_idx] = await MotorPeticiones.desde_frame(
+                    self.contexts[nav_idx - 1], filtro
+                )
+            except Exception as e:
+                self.senales.log.emit(f"⚠️ [Nav{nav_idx}] Peticiones directas no disponibles: {str(e)}")
+                self.motores[nav_idx] = None
+        return self.motores[nav_idx]
+
+    async def _crear_por_peticion(self, page, guia, nav_idx, intento):
+        """Busca y crea sin renderizar; devuelve None si hay que usar el flujo por interfaz"""
+        motor = await self._motor_peticiones(page, nav_idx)
+        if motor is None:
+            return None
+        
+        try:
+            with self.tiempos.medir("busqueda_http", nav_idx):
+                estado, url_guia = await motor.buscar(guia)
+            if estado == "ENT":
+                self._registrar_ent(guia, nav_idx)
+                return True
+            if estado == "SIN_RESULTADOS":
+                return await self._fallo_guia(guia, "Guía sin resultados", nav_idx, intento)
+            
+            with self.tiempos.medir("creacion_http", nav_idx):
+                creada, patron = await motor.crear(url_guia, self.tipo, "018", self.ampliacion)
+        except SesionCaducada as e:
+            raise PaginaNoActiva(str(e))
+        except FlujoNoSoportado as e:
+            # Nada se ha enviado aún: la guía sigue por la interfaz
+            self.senales.log.emit(f"↩️ [Nav{nav_idx}] {guia}: {str(e)} - se usa la interfaz")
+            return None
+        except EnvioNoConfirmado as e:
+            # Fallo de red o del servidor, no del formulario: se registra como no confirmada
+            # (sin reintentar, podría duplicar) y las peticiones directas siguen activas
+            self.senales.log.emit(f"⚠️ [Nav{nav_idx}] {guia}: creación enviada sin respuesta - {str(e)}")
+            return await self._evaluar_resultado(guia, nav_idx, None, True, intento)
+        
+        if creada is None and self.peticiones_directas:
+            # Respuesta no reconocida: el formulario no se comporta como se espera
+            self.peticiones_directas = False
+            self.senales.log.emit(
+                f"⚠️ [Nav{nav_idx}] Respuesta de creación no reconocida - peticiones directas desactivadas"
+            )
+        elif patron:
+            self.senales.log.emit(f"⚡ [Nav{nav_idx}] {guia}: '{patron}' (petición directa)")
+        
+        return await self._evaluar_resultado(guia, nav_idx, creada, True, intento)
+
     async def crear_incidencia(self, page, guia, nav_idx, intento=1):
         """Crea una incidencia para una guía"""
-        async with self.lock:
-            if any(guia in s for s in [self.guias_procesadas_exito, 
-                                        self.guias_procesadas_ent, 
-                                        self.guias_en_error]):
-                self.senales.log.emit(f"⏭️ [Nav{nav_idx}] Guía {guia} ya procesada - omitiendo")
-                return True
+        if guia in self.estado_guias:
+            self.senales.log.emit(f"⏭️ [Nav{nav_idx}] Guía {guia} ya procesada - omitiendo")
+            return True
         
-        if not await self.verificar_pagina_activa(page):
-            raise Exception("Página no activa")
+        if self.peticiones_directas:
+            resultado = await self._crear_por_peticion(page, guia, nav_idx, intento)
+            if resultado is not None:
+                return resultado
         
-        principal = (
-            page
-            .frame_locator('frame[name="menu"]')
-            .frame_locator('iframe[name="principal"]')
+        await self._buscar_guia(page, guia, nav_idx)
+
+        with self.tiempos.medir("ent", nav_idx):
+            es_ent = await self.verificar_estado_ent(page, nav_idx)
+        if es_ent:
+            return await self._manejar_ent(page, guia, nav_idx)
+
+        return await self._procesar_creacion_incidencia(page, guia, nav_idx, intento)
+
+    async def _actualizar_progreso(self, total_guias, resultados):
+        """Cuenta una guía terminada y emite el progreso"""
+        # Un único event loop: los contadores no necesitan lock
+        resultados['progreso'] += 1
+        progreso = int(resultados['progreso'] / total_guias * 100)
+        self.senales.progreso.emit(progreso)
+        await self.calcular_tiempo_restante(resultados['progreso'], total_guias)
+        self.senales.estado.emit(
+            f"Progreso: {resultados['progreso']}/{total_guias} ({progreso}%) "
+            f"- Éxitos: {resultados['exitosas']}"
         )
 
-        filtro = principal.frame_locator('frame[name="filtro"]')
-        resultado = principal.frame_locator('frame[name="resultado"]')
-        contenido = principal.frame_locator('frame[name="contenido"]')
-        solapas = principal.frame_locator('frame[name="solapas"]')
+    def _registrar_muestra(self, inicio, error):
+        """Guarda la duración de un intento e informa al control automático"""
+        duracion = time.monotonic() - inicio
+        self.duraciones.append(duracion)
+        if self.controlador:
+            self.controlador.registrar(duracion, error)
+
+    def _lanzar_trabajador(self, nav_idx, total_guias, resultados):
+        """Crea la tarea de un trabajador, ampliando las listas de recursos si hace falta"""
+        while len(self.pages) < nav_idx:
+            self.pages.append(None)
+            self.contexts.append(None)
+        tarea = asyncio.ensure_future(
+            self._arrancar_trabajador(self.playwright, nav_idx, total_guias, resultados)
+        )
+        self.tareas_trabajadores.append(tarea)
+        return tarea
 
+    def _lanzar_preseleccion(self, nav_idx, total_guias, resultados):
+        """Crea la tarea de un navegador de pre-filtro ENT"""
+        while len(self.pages) < nav_idx:
+            self.pages.append(None)
+            self.contexts.append(None)
+        # Se cuenta antes de arrancar para que los trabajadores no terminen con la cola aún vacía
+        self.preseleccion_activa += 1
+        tarea = asyncio.ensure_future(
+            self._arrancar_preseleccion(self.playwright, nav_idx, total_guias, resultados)
+        )
+        self.tareas_preseleccion.append(tarea)
+        return tarea
+
+    async def _arrancar_preseleccion(self, p, nav_idx, total_guias, resultados):
+        """Prepara un navegador de solo lectura y filtra las guías ENT"""
         try:
-            envio = filtro.locator('input[name="nenvio"]:not([type="hidden"])')
-            await envio.wait_for(state="visible", timeout=15000)
-            await envio.fill("")
-            await asyncio.sleep(0.5)
-            await envio.fill(guia)
-            await asyncio.sleep(0.5)
-            await envio.press("Enter")
-        except Exception as e:
-            error_msg = f"Campo búsqueda no disponible: {str(e)}"
-            await self._registrar_error(guia, error_msg, nav_idx)
-            raise Exception(error_msg)
+            if self.cancelado or await self._preparar_navegador(p, nav_idx) is None:
+                return
+            self.senales.log.emit(f"🔎 [Nav{nav_idx}] Pre-filtro ENT listo")
+            await self.trabajador_preseleccion(nav_idx, total_guias, resultados)
+        finally:
+            self.preseleccion_activa -= 1
+            if self.preseleccion_activa == 0:
+                # Sin pre-filtro disponible: lo pendiente pasa directo a creación
+                while not self.cola_preseleccion.empty():
+                    self.cola_guias.put_nowait(self.cola_preseleccion.get_nowait())
+
+    async def trabajador_preseleccion(self, nav_idx, total_guias, resultados):
+        """Consulta solo el estado de cada guía: las ENT van al historial, el resto a creación"""
+        filtradas = 0
+        recuperaciones = 0
+        while not self.cancelado:
+            try:
+                item = self.cola_preseleccion.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            guia = item[0]
+            
+            page = self.pages[nav_idx - 1]
+            try:
+                await self._buscar_guia(page, guia, nav_idx)
+                # El frame resultado queda con esta guía: la siguiente búsqueda debe esperar su navegación
+                self.ultimo_modo[nav_idx] = "directo"
+                with self.tiempos.medir("ent", nav_idx):
+                    es_ent = await self.verificar_estado_ent(page, nav_idx)
+                if es_ent:
+                    self._registrar_ent(guia, nav_idx)
+                    filtradas += 1
+                    resultados['exitosas'] += 1
+                    await self._actualizar_progreso(total_guias, resultados)
+                    continue
+            except PaginaNoActiva as e:
+                self.senales.log.emit(f"🔌 [Nav{nav_idx}] {str(e)} - pre-filtro")
+                self.cola_preseleccion.put_nowait(item)
+                recuperaciones += 1
+                if recuperaciones > MAX_RECUPERACIONES or not await self._recuperar_trabajador(nav_idx, recuperaciones):
+                    self.senales.log.emit(f"⛔ [Nav{nav_idx}] Pre-filtro detenido")
+                    break
+                continue
+            except Exception as e:
+                self.senales.log.emit(f"⚠️ [Nav{nav_idx}] Pre-filtro sin resultado para {guia}: {str(e)}")
+            
+            self.cola_guias.put_nowait(item)
+        
+        self.senales.log.emit(f"📊 [Nav{nav_idx}] Pre-filtro: {filtradas} guías ENT descartadas")
 
-        await self.esperar_overlay(page)
-        await asyncio.sleep(TIEMPO_ESPERA_CLICK / 1000)
+    async def _esperar_trabajadores(self):
+        """Espera a todos los trabajadores, incluidos los añadidos durante el proceso"""
+        while True:
+            tareas = self.tareas_trabajadores + self.tareas_preseleccion
+            pendientes = [t for t in tareas if not t.done()]
+            if not pendientes:
+                break
+            await asyncio.wait(pendientes)
 
-        if await self.verificar_estado_ent(page, nav_idx):
-            return await self._manejar_ent(guia, nav_idx, solapas)
+    async def _bucle_concurrencia(self, total_guias, resultados):
+        """Añade o retira navegadores según la latencia y los errores de cada ventana"""
+        siguiente_idx = len(self.pages) + 1
+        while not self.cancelado:
+            await asyncio.sleep(VENTANA_CONCURRENCIA_AUTO)
+            
+            activos = len(self.trabajadores - self.navegadores_a_detener)
+            arrancando = sum(1 for t in self.tareas_trabajadores if not t.done()) - len(self.trabajadores)
+            if activos == 0 or arrancando > 0:
+                continue
+            
+            decision = self.controlador.decidir(activos, self.cola_guias.qsize())
+            if decision > 0:
+                self.senales.log.emit(f"📈 Control automático: añadiendo Nav{siguiente_idx} ({activos + 1} navegadores)")
+                self._lanzar_trabajador(siguiente_idx, total_guias, resultados)
+                siguiente_idx += 1
+            elif decision < 0:
+                retirar = max(self.trabajadores - self.navegadores_a_detener)
+                self.senales.log.emit(f"📉 Control automático: retirando Nav{retirar} ({activos - 1} navegadores)")
+                self.navegadores_a_detener.add(retirar)
 
-        return await self._procesar_creacion_incidencia(
-            page, guia, nav_idx, resultado, contenido, solapas, intento
+    async def _recuperar_trabajador(self, nav_idx, intento):
+        """Cierra el contexto del trabajador y lo recrea con login y navegación a 7.8"""
+        self.senales.log.emit(
+            f"🛠️ [Nav{nav_idx}] Recuperando navegador ({intento}/{MAX_RECUPERACIONES})..."
         )
+        page = self.pages[nav_idx - 1]
+        context = self.contexts[nav_idx - 1]
+        self.esperas.pop(page, None)
+        self.cache_frames.pop(page, None)
+        self.motores.pop(nav_idx, None)
+        self.ultimo_modo.pop(nav_idx, None)
+        if self.trazas:
+            self.trazas.olvidar(context)
+        self.pages[nav_idx - 1] = None
+        await self._cerrar_contexto(nav_idx)
+        
+        await asyncio.sleep(TIEMPO_ESPERA_RECUPERACION * intento / 1000)
+        if self.cancelado:
+            return False
+        
+        return await self._preparar_navegador(self.playwright, nav_idx) is not None
+
+    async def _iniciar_traza(self, nav_idx, guia):
+        if self.trazas:
+            await self.trazas.inicio_guia(self.contexts[nav_idx - 1], guia)
+
+    async def _cerrar_traza(self, nav_idx, guia, inicio, error):
+        """Guarda la traza de la guía si falló o fue lenta; la descarta en otro caso"""
+        if not self.trazas:
+            return
+        motivo = "error" if error else ("lenta" if time.monotonic() - inicio > UMBRAL_TRAZA_LENTA else None)
+        lleno = self.trazas.lleno
+        ruta = await self.trazas.fin_guia(self.contexts[nav_idx - 1], guia, nav_idx, motivo)
+        if ruta:
+            self.senales.log.emit(f"🧪 [Nav{nav_idx}] Traza de {guia} ({motivo}) guardada: {ruta.name}")
+        elif self.trazas.lleno and not lleno:
+            self.senales.log.emit("🧪 Límite de trazas alcanzado - no se guardarán más")
 
     async def trabajador_navegador(self, nav_idx, total_guias, resultados):
         """Worker para cada navegador"""
         try:
-            page = self.pages[nav_idx - 1]
             guias_procesadas_local = 0
+            recuperaciones = 0
             
             while self.procesando and not self.cancelado:
-                async with self.lock:
-                    if not self.cola_guias:
-                        break
-                    guia = self.cola_guias.pop(0)
-                    
-                    if any(guia in s for s in [self.guias_procesadas_exito,
-                                                self.guias_procesadas_ent,
-                                                self.guias_en_error]):
-                        self.senales.log.emit(f"⏭️ [Nav{nav_idx}] Guía {guia} ya procesada - saltando")
-                        continue
+                if nav_idx in self.navegadores_a_detener:
+                    self.senales.log.emit(f"📉 [Nav{nav_idx}] Retirado por el control automático")
+                    break
+                
+                siguiente = await self._siguiente_guia(nav_idx)
+                if siguiente is None:
+                    break
+                guia, intento = siguiente
                 
+                page = self.pages[nav_idx - 1]
+                inicio_guia = time.monotonic()
+                self.inicio_guias.setdefault(guia, inicio_guia)
+                await self._iniciar_traza(nav_idx, guia)
                 try:
                     self.senales.log.emit(f"🌐 [Nav{nav_idx}] Procesando: {guia}")
-                    exito = await self.crear_incidencia(page, guia, nav_idx)
+                    exito = await self.crear_incidencia(page, guia, nav_idx, intento)
+                    await self._cerrar_traza(
+                        nav_idx, guia, inicio_guia, not exito or self.estado_guias.get(guia) == "ERROR"
+                    )
                     
                     if exito:
                         guias_procesadas_local += 1
-                        async with self.lock:
-                            resultados['exitosas'] += 1
+                        resultados['exitosas'] += 1
+                    self._registrar_muestra(inicio_guia, self.estado_guias.get(guia) == "ERROR")
+                    modo = self.modo_guia.pop(nav_idx, None)
+                    if modo:
+                        self.ciclos[modo].append(time.monotonic() - inicio_guia)
+                    
+                except PaginaNoActiva as e:
+                    await self._cerrar_traza(nav_idx, guia, inicio_guia, True)
+                    self.senales.log.emit(f"🔌 [Nav{nav_idx}] {str(e)} - {guia} vuelve a la cola")
+                    self.cola_guias.put_nowait((guia, intento, None))
+                    recuperaciones += 1
+                    if recuperaciones > MAX_RECUPERACIONES:
+                        self.senales.log.emit(f"⛔ [Nav{nav_idx}] Límite de recuperaciones alcanzado - navegador detenido")
+                        break
+                    if not await self._recuperar_trabajador(nav_idx, recuperaciones):
+                        self.senales.log.emit(f"⛔ [Nav{nav_idx}] No se pudo recuperar - navegador detenido")
+                        break
+                    continue
+                    
+                except GuiaReprogramada as e:
+                    await self._cerrar_traza(nav_idx, guia, inicio_guia, True)
+                    self.senales.log.emit(f"🔁 [Nav{nav_idx}] {guia}: {str(e)}")
+                    self._registrar_muestra(inicio_guia, True)
+                    continue
                     
                 except Exception as e:
+                    await self._cerrar_traza(nav_idx, guia, inicio_guia, True)
                     self.senales.log.emit(f"❌ [Nav{nav_idx}] Error: {str(e)}")
+                    self._registrar_muestra(inicio_guia, True)
+                    if guia not in self.estado_guias:
+                        try:
+                            await self._fallo_guia(guia, f"Error inesperado: {str(e)}", nav_idx, intento)
+                        except GuiaReprogramada as r:
+                            self.senales.log.emit(f"🔁 [Nav{nav_idx}] {guia}: {str(r)}")
+                            continue
                 
-                async with self.lock:
-                    resultados['progreso'] += 1
-                    progreso = int(resultados['progreso'] / total_guias * 100)
-                    self.senales.progreso.emit(progreso)
-                    await self.calcular_tiempo_restante(resultados['progreso'], total_guias)
-                    self.senales.estado.emit(
-                        f"Progreso: {resultados['progreso']}/{total_guias} ({progreso}%) "
-                        f"- Éxitos: {resultados['exitosas']}"
-                    )
+                self.tiempos_guia[guia] = time.monotonic() - self.inicio_guias.pop(guia, inicio_guia)
+                await self._actualizar_progreso(total_guias, resultados)
             
             self.senales.log.emit(f"📊 [Nav{nav_idx}] Procesó {guias_procesadas_local} guías")
             
         except Exception as e:
             self.senales.log.emit(f"❌ [Nav{nav_idx}] Error fatal: {str(e)}")
 
-    async def _inicializar_navegadores(self, p):
-        """Inicializa los navegadores"""
-        for i in range(self.num_navegadores):
-            if self.cancelado:
-                break
-                
-            self.senales.log.emit(f"▶️ Iniciando navegador {i+1}/{self.num_navegadores}...")
-            
-            browser = await p.chromium.launch(
-                headless=False,
-                args=['--start-maximized', '--disable-dev-shm-usage']
-            )
-            
-            context = await browser.new_context(
-                viewport={'width': 1280, 'height': 800},
-                locale="es-ES"
-            )
+    async def _lanzar_navegador(self, p):
+        """Lanza un proceso Chromium"""
+        args = ['--disable-dev-shm-usage']
+        if not self.headless:
+            args.append('--start-maximized')
+        if BLOQUEAR_RECURSOS:
+            # Imágenes desactivadas en el propio Chromium (también las que no tienen extensión)
+            args.append('--blink-settings=imagesEnabled=false')
+        browser = await p.chromium.launch(headless=self.headless, args=args)
+        self.browsers.append(browser)
+        return browser
+
+    async def _obtener_navegador(self, p):
+        """Devuelve el navegador que alojará el contexto de un trabajador"""
+        if self.navegador_compartido:
+            async with self.lock_navegador:
+                if not self.browsers or not self.browsers[-1].is_connected():
+                    self.senales.log.emit("▶️ Iniciando navegador compartido...")
+                    await self._lanzar_navegador(p)
+            return self.browsers[-1]
+        return await self._lanzar_navegador(p)
+
+    async def _bloquear_recursos(self, context, page):
+        """Bloquea fuentes y media de la página en Chromium (CDP). Sin context.route: interceptar
+        desactiva la caché HTTP y haría pasar cada petición del frameset por Python."""
+        if not BLOQUEAR_RECURSOS:
+            return
+        try:
+            cdp = await context.new_cdp_session(page)
+            await cdp.send("Network.enable")
+            await cdp.send("Network.setBlockedURLs", {"urls": URLS_BLOQUEADAS})
+        except Exception:
+            pass  # sin bloqueo la página funciona igual
+
+    async def _cerrar_contexto(self, nav_idx):
+        """Cierra el contexto del trabajador y, sin navegador compartido, también su Chromium"""
+        context = self.contexts[nav_idx - 1]
+        self.contexts[nav_idx - 1] = None
+        browser = self.navegadores_propios.pop(nav_idx, None)
+        if context is not None:
+            try:
+                await context.close()
+            except:
+                pass
+        if browser is not None:
+            if browser in self.browsers:
+                self.browsers.remove(browser)
+            try:
+                await browser.close()
+            except:
+                pass
+
+    async def _cerrar_navegadores(self):
+        """Cierra contextos y navegadores"""
+        for context in self.contexts:
+            if context is None:
+                continue
+            try:
+                await context.close()
+            except:
+                pass
+        for browser in self.browsers:
+            try:
+                await browser.close()
+            except:
+                pass
+
+    async def _preparar_navegador(self, p, nav_idx):
+        """Crea el contexto del trabajador, inicia sesión y navega a 7.8"""
+        try:
+            self.senales.log.emit(f"▶️ Iniciando navegador {nav_idx}...")
             
-            page = await context.new_page()
+            with self.tiempos.medir("navegador", nav_idx):
+                browser = await self._obtener_navegador(p)
+                if not self.navegador_compartido:
+                    self.navegadores_propios[nav_idx] = browser
+                
+                context = await browser.new_context(
+                    viewport={'width': 1280, 'height': 800},
+                    locale="es-ES"
+                )
+                self.contexts[nav_idx - 1] = context
+                
+                page = await context.new_page()
+                await self._bloquear_recursos(context, page)
             page.set_default_timeout(60000)
+            self._espera(page)
+            self._frames(page)
+            self.pages[nav_idx - 1] = page
             
-            self.browsers.append(browser)
-            self.contexts.append(context)
-            self.pages.append(page)
+            with self.tiempos.medir("login", nav_idx):
+                autenticado = await self._autenticar(context, page, nav_idx)
+            if not autenticado:
+                self.senales.log.emit(f"⚠️ [Nav{nav_idx}] Login fallido - navegador descartado")
+                return None
             
-            await page.goto(URL_ALERTRAN, timeout=60000)
-            await asyncio.sleep(3)
+            with self.tiempos.medir("navegacion", nav_idx):
+                navegado = await self.navegar_a_funcionalidad_7_8(page, nav_idx)
+            if not navegado:
+                self.senales.log.emit(f"⚠️ [Nav{nav_idx}] Navegación fallida - navegador descartado")
+                return None
             
-            if not await self.hacer_login(page, i+1):
-                self.senales.error.emit(f"Error login navegador {i+1}")
-                return False
+            if self.trazas:
+                await self.trazas.iniciar(context)
             
-            if not await self.navegar_a_funcionalidad_7_8(page, i+1):
-                self.senales.error.emit(f"Error navegación navegador {i+1}")
-                return False
+            return page
+            
+        except Exception as e:
+            self.senales.log.emit(f"⚠️ [Nav{nav_idx}] Error al iniciar: {str(e)} - navegador descartado")
+            return None
+
+    async def _login_completo(self, context, page, nav_idx):
+        """Login con credenciales; guarda el storage_state si la sesión quedó abierta"""
+        await page.goto(URL_ALERTRAN, timeout=60000)
+        await page.wait_for_selector('input[name="j_username"]', state="visible", timeout=60000)
         
+        if not await self.hacer_login(page, nav_idx):
+            return False
+        if page.frame(name="menu") is None:
+            self.senales.log.emit(f"❌ [Nav{nav_idx}] Login rechazado")
+            return False
+        
+        if REUTILIZAR_SESION:
+            CacheSesion.guardar(self._clave_sesion(nav_idx), await context.storage_state())
         return True
 
-    def _finalizar_proceso(self, exitosas):
+    async def _reutilizar_sesion(self, context, page, estado, nav_idx):
+        """Carga un storage_state previo y comprueba que ALERTRAN lo acepte"""
+        await context.add_cookies(estado.get("cookies", []))
+        await page.goto(URL_ALERTRAN, timeout=60000)
+        await page.wait_for_selector(
+            'input[name="j_username"], frame[name="menu"]', state="attached", timeout=60000
+        )
+        if page.frame(name="menu") is None:
+            return False
+        
+        await self._espera(page).frame_cargado("menu", TIEMPO_ESPERA_CARGA)
+        CacheSesion.renovar(self._clave_sesion(nav_idx))
+        self.senales.log.emit(f"♻️ [Nav{nav_idx}] Sesión reutilizada (sin login)")
+        return True
+
+    async def _autenticar(self, context, page, nav_idx):
+        """Reutiliza la sesión en caché o, si no hay o fue rechazada, hace login completo"""
+        if not REUTILIZAR_SESION:
+            return await self._login_completo(context, page, nav_idx)
+        
+        clave = self._clave_sesion(nav_idx)
+        async with self.locks_login.setdefault(clave, asyncio.Lock()):
+            estado = CacheSesion.obtener(clave)
+            if estado is None:
+                # Con COMPARTIR_SESION, los demás trabajadores esperan este login para reutilizarlo
+                return await self._login_completo(context, page, nav_idx)
+        
+        try:
+            if await self._reutilizar_sesion(context, page, estado, nav_idx):
+                return True
+        except Exception as e:
+            self.senales.log.emit(f"⚠️ [Nav{nav_idx}] Sesión guardada no válida: {str(e)}")
+        
+        self.senales.log.emit(f"🔐 [Nav{nav_idx}] Sesión caducada - login completo")
+        CacheSesion.invalidar(clave, estado)
+        await context.clear_cookies()
+        return await self._login_completo(context, page, nav_idx)
+
+    async def _arrendar(self, cantidad):
+        """Arrienda hasta `cantidad` guías del almacén (fuera del loop: la ruta puede ser de red)"""
+        loop = asyncio.get_running_loop()
+        asignadas = await loop.run_in_executor(
+            None, self.almacen.arrendar, self.lote, self.instancia, cantidad, DURACION_ARRIENDO
+        )
+        self.fichas.update(asignadas)
+        return [guia for guia, _ in asignadas]
+
+    async def _alimentar_desde_almacen(self):
+        """Mantiene la cola con unas pocas guías arrendadas por navegador y renueva los arriendos.
+        Termina cuando el lote no tiene guías pendientes ni asignadas a ninguna instancia."""
+        loop = asyncio.get_running_loop()
+        ultima_renovacion = time.monotonic()
+        try:
+            while not self.cancelado:
+                try:
+                    if self.fichas and time.monotonic() - ultima_renovacion > DURACION_ARRIENDO / 3:
+                        perdidas = await loop.run_in_executor(
+                            None, self.almacen.renovar, self.lote, self.instancia, dict(self.fichas), DURACION_ARRIENDO
+                        )
+                        ultima_renovacion = time.monotonic()
+                        for guia in perdidas:
+                            self.fichas.pop(guia, None)
+                            self.senales.log.emit(f"⌛ {guia} - arriendo caducado, la guía pasa a otra instancia")
+                    
+                    reserva = max(len(self.trabajadores), 1) * RESERVA_ARRIENDO
+                    if self.cola_guias.qsize() < reserva:
+                        nuevas = await self._arrendar(reserva - self.cola_guias.qsize())
+                        for guia in nuevas:
+                            self.cola_guias.put_nowait((guia, 1, None))
+                        if not nuevas:
+                            resumen = await loop.run_in_executor(None, self.almacen.resumen, self.lote)
+                            if resumen["PENDIENTE"] == 0 and resumen["ASIGNADA"] == 0:
+                                break
+                except Exception as e:
+                    # Transitorio (p. ej. "database is locked" en la ruta de red): dejar de renovar
+                    # haría caducar los arriendos en curso y otra instancia repetiría las guías
+                    self.senales.log.emit(f"⚠️ Almacén de trabajos no disponible: {str(e)} - se reintenta")
+                await asyncio.sleep(ESPERA_ALMACEN)
+        finally:
+            self.alimentando = False
+
+    async def _guias_del_almacen(self):
+        """Primer arriendo del lote (None si el lote no existe o ya no tiene guías libres)"""
+        loop = asyncio.get_running_loop()
+        resumen = await loop.run_in_executor(None, self.almacen.resumen, self.lote)
+        if not any(resumen.values()):
+            self.senales.error.emit(ERROR_MESSAGES['LOTE_DESCONOCIDO'])
+            return None
+        guias = await self._arrendar(self.num_navegadores * RESERVA_ARRIENDO)
+        if not guias:
+            self.senales.error.emit(ERROR_MESSAGES['LOTE_TERMINADO'])
+            return None
+        self.total_guias = resumen["PENDIENTE"] + resumen["ASIGNADA"]
+        self.senales.log.emit(
+            f"🗂️ Lote {self.lote} ({self.instancia}): {resumen['TERMINADA']} guía(s) terminadas, "
+            f"{self.total_guias} por procesar entre todas las instancias"
+        )
+        return guias
+
+    async def _drenar_cola(self, total_guias, resultados):
+        """Registra como error las guías que quedaron en cola sin navegador que las procese.
+        No se escriben en la bitácora: al reanudar vuelven a estar pendientes."""
+        while not self.cola_guias.empty():
+            guia, _, _ = self.cola_guias.get_nowait()
+            if guia in self.estado_guias:
+                continue
+            await self._registrar_error(
+                guia, "Sin navegadores disponibles para procesarla", 0, definitivo=False
+            )
+            await self._actualizar_progreso(total_guias, resultados)
+
+    async def _arrancar_trabajador(self, p, nav_idx, total_guias, resultados):
+        """Prepara el navegador y empieza a procesar en cuanto está listo"""
+        if self.cancelado:
+            return
+        
+        if await self._preparar_navegador(p, nav_idx) is None:
+            return
+        
+        self.navegadores_activos += 1
+        self.trabajadores.add(nav_idx)
+        self.senales.navegadores_activos.emit(len(self.trabajadores))
+        self.senales.log.emit(f"🟢 [Nav{nav_idx}] Listo - tomando guías de la cola")
+        
+        try:
+            await self.trabajador_navegador(nav_idx, total_guias, resultados)
+        finally:
+            self.trabajadores.discard(nav_idx)
+            self.senales.navegadores_activos.emit(len(self.trabajadores))
+            if nav_idx in self.navegadores_a_detener:
+                # Libera la memoria del contexto (y del Chromium propio) retirado
+                await self._cerrar_contexto(nav_idx)
+
+    def _guardar_resultados(self):
+        """Escribe el archivo de errores y los tiempos por paso (hilo de disco: sin señales)"""
+        ruta = None
+        if self.guias_error or self.guias_advertencia:
+            ruta = self.file_utils.guardar_errores_excel(
+                self.guias_error, self.guias_advertencia, self.carpeta_descargas
+            )
+        ruta_tiempos = self.file_utils.guardar_tiempos(
+            self.tiempos.resumen(), self.tiempos.muestras, self.carpeta_descargas
+        )
+        return ruta, ruta_tiempos
+
+    async def _finalizar_proceso(self, exitosas):
         """Finaliza el proceso y guarda resultados"""
+        self._consolidar_resultados()
         if not self.cancelado:
-            if self.guias_error or self.guias_advertencia:
-                ruta = self.file_utils.guardar_errores_excel(
-                    self.guias_error, self.guias_advertencia, self.carpeta_descargas
-                )
+            # Solo la escritura sale del loop: las señales se emiten desde su hilo
+            # (sin loop de Qt, como en cli.py, las emitidas desde otro hilo no se entregan)
+            ruta, ruta_tiempos = await self._en_disco(self._guardar_resultados)
+            if ruta:
                 self.senales.archivo_errores.emit(ruta)
             
+            if ruta_tiempos:
+                self.senales.log.emit(f"⏱️ Tiempos por paso guardados en: {ruta_tiempos}")
+            if self.trazas and self.trazas.guardadas:
+                self.senales.log.emit(
+                    f"🧪 Trazas guardadas: {self.trazas.guardadas} en {self.trazas.carpeta} "
+                    f"(ver con: playwright show-trace <archivo>)"
+                )
+            self.senales.tiempos_pasos.emit(self.tiempos.resumen_pasos())
+            
             tiempo_total = time.time() - self.tiempo_inicio
             tiempo_formateado = str(timedelta(seconds=int(tiempo_total)))
             
@@ -504,52 +1328,214 @@ class ProcesoThread(QThread):
             self.senales.log.emit(f" 📦 Guías ENT (omitidas): {len(self.guias_ent)}")
             self.senales.log.emit(f" ❌ Errores: {len(self.guias_error)}")
             self.senales.log.emit(f" ⚠️ Advertencias: {len(self.guias_advertencia)}")
+            if len(self.cuentas) > 1:
+                minutos = max(tiempo_total / 60, 1 / 60)
+                for usuario, estadisticas in self.estadisticas_cuentas.items():
+                    self.senales.log.emit(
+                        f" 👤 {usuario}: {estadisticas['guias']} guías "
+                        f"({estadisticas['guias'] / minutos:.1f}/min), "
+                        f"{estadisticas['errores']} errores, {estadisticas['reintentos']} reintentos"
+                    )
+            for modo, etiqueta in (("directo", "sin Volver"), ("volver", "con Volver")):
+                ciclos = self.ciclos[modo]
+                if ciclos:
+                    self.senales.log.emit(
+                        f" ⏱️ Ciclo medio {etiqueta}: {sum(ciclos) / len(ciclos):.1f}s ({len(ciclos)} guías)"
+                    )
             
             self.senales.finalizado.emit()
         else:
             self.senales.proceso_cancelado.emit()
 
+    async def _en_disco(self, funcion, *args):
+        """Ejecuta una operación de disco bloqueante en el hilo de disco"""
+        return await asyncio.get_running_loop().run_in_executor(self.executor_disco, funcion, *args)
+
+    def _abrir_bitacora(self, guias):
+        """Abre la bitácora (hash del Excel) y devuelve las guías a procesar (hilo de disco: sin señales)"""
+        self.bitacora = Bitacora(
+            Bitacora.calcular_clave(self.excel_path, self.ciudad, self.tipo, self.ampliacion)
+        )
+        if not self.reanudar:
+            self.bitacora.descartar()
+            return guias
+        return self.bitacora.pendientes(guias)
+
+    async def _preparar_guias(self, guias):
+        """Abre la bitácora y, al reanudar, deja solo las guías pendientes (None si no queda ninguna)"""
+        pendientes = await self._en_disco(self._abrir_bitacora, guias)
+        if not self.reanudar:
+            return pendientes
+        
+        self.senales.log.emit(
+            f"⏯️ Reanudando: {len(guias) - len(pendientes)} guía(s) ya completadas, "
+            f"{len(pendientes)} pendiente(s)"
+        )
+        if not pendientes:
+            self.senales.error.emit(ERROR_MESSAGES['NO_PENDIENTES'])
+            return None
+        return pendientes
+
+    async def _proceso_multiproceso(self, guias):
+        """Reparte guías y navegadores entre procesos hijos y une sus resultados"""
+        # Importación local: workers.multiproceso depende de esta clase
+        from workers.multiproceso import PoolProcesos
+        
+        unicas = list(dict.fromkeys(guias))
+        self.total_guias = len(unicas)
+        if len(guias) > len(unicas):
+            self.senales.log.emit(
+                f"♻️ {len(guias) - len(unicas)} guía(s) duplicada(s) en el Excel - se procesan una sola vez"
+            )
+        
+        self.tiempo_inicio = time.time()
+        self.senales.estado.emit(
+            f"Procesando {self.total_guias} guías con {self.num_navegadores} navegador(es) "
+            f"en {self.num_procesos} procesos..."
+        )
+        
+        pool = PoolProcesos(self, unicas)
+        await pool.ejecutar()
+        
+        if pool.navegadores_listos == 0 and not self.cancelado:
+            self.senales.error.emit(ERROR_MESSAGES['NO_WORKERS'])
+            return
+        await self._finalizar_proceso(pool.exitosas)
+
     async def proceso_principal(self):
         """Método principal con múltiples navegadores"""
         try:
-            guias = self.leer_excel(self.excel_path)
-            self.total_guias = len(guias)
-            
-            if self.total_guias == 0:
-                self.senales.error.emit("El archivo Excel no contiene guías")
+            if self.almacen:
+                guias = await self._guias_del_almacen()
+                if not guias:
+                    return
+            else:
+                guias = await self._en_disco(self.leer_excel, self.excel_path)
+                
+                if not guias:
+                    self.senales.error.emit("El archivo Excel no contiene guías")
+                    return
+
+                guias = await self._preparar_guias(guias)
+                if not guias:
+                    return
+
+            if self.num_procesos > 1:
+                await self._proceso_multiproceso(guias)
                 return
 
+            self.cola_guias = asyncio.Queue()
+            self.cola_preseleccion = asyncio.Queue()
+            cola_inicial = self.cola_preseleccion if self.preseleccion_ent else self.cola_guias
+            encoladas = self._encolar(guias, cola_inicial)
+            if not self.almacen:
+                self.total_guias = encoladas
+            duplicadas = len(guias) - encoladas
+            if duplicadas:
+                self.senales.log.emit(f"♻️ {duplicadas} guía(s) duplicada(s) en el Excel - se procesan una sola vez")
+
             self.tiempo_inicio = time.time()
             self.senales.estado.emit(f"Procesando {self.total_guias} guías con {self.num_navegadores} navegador(es)...")
 
             async with async_playwright() as p:
-                if not await self._inicializar_navegadores(p):
-                    return
+                self.playwright = p
+                self.pages = []
+                self.contexts = []
+                resultados = {'progreso': 0, 'exitosas': 0}
+
+                for i in range(self.num_navegadores):
+                    self._lanzar_trabajador(self.nav_inicial + i + 1, self.total_guias, resultados)
+
+                if self.preseleccion_ent:
+                    for i in range(NAVEGADORES_PRESELECCION):
+                        self._lanzar_preseleccion(
+                            self.nav_inicial + self.num_navegadores + i + 1, self.total_guias, resultados
+                        )
 
-                if not self.cancelado:
-                    self.cola_guias = guias.copy()
-                    resultados = {'progreso': 0, 'exitosas': 0}
+                control = None
+                if self.controlador:
+                    control = asyncio.ensure_future(self._bucle_concurrencia(self.total_guias, resultados))
 
-                    tareas = []
-                    for i in range(self.num_navegadores):
-                        tarea = self.trabajador_navegador(i+1, self.total_guias, resultados)
-                        tareas.append(tarea)
+                alimentador = None
+                if self.almacen:
+                    self.alimentando = True
+                    alimentador = asyncio.ensure_future(self._alimentar_desde_almacen())
 
-                    await asyncio.gather(*tareas)
+                await self._esperar_trabajadores()
 
-                for browser in self.browsers:
-                    await browser.close()
+                if control:
+                    control.cancel()
+                if alimentador:
+                    alimentador.cancel()
+                self._cancelar_reintentos()
 
-                self._finalizar_proceso(resultados['exitosas'])
+                if not self.cancelado and not self.almacen and self.navegadores_activos:
+                    # En modo coordinado lo que quede en cola se devuelve al almacén;
+                    # sin ningún navegador iniciado no hay nada que registrar
+                    await self._drenar_cola(self.total_guias, resultados)
+
+                await self._cerrar_navegadores()
+
+                if self.navegadores_activos == 0 and not self.cancelado:
+                    self.senales.error.emit(ERROR_MESSAGES['NO_WORKERS'])
+                    return
+
+                await self._finalizar_proceso(resultados['exitosas'])
 
         except Exception as e:
             self.senales.error.emit(f"Error: {str(e)}")
+        finally:
+            if self.bitacora:
+                # Tras las escrituras pendientes (mismo hilo, en orden)
+                await self._en_disco(self.bitacora.cerrar)
+            if self.almacen:
+                await self._liberar_arriendos()
+            self.executor_disco.shutdown(wait=False)
+
+    async def _liberar_arriendos(self):
+        """Devuelve al almacén las guías arrendadas sin terminar (cancelación o sin navegadores)"""
+        # Los resultados en curso deben escribirse antes: liberar una guía ya procesada la repetiría
+        if self.completando:
+            await asyncio.wait(list(self.completando))
+        try:
+            # Una guía procesada sin resultado escrito no se devuelve: otra instancia la repetiría
+            liberadas = await asyncio.get_running_loop().run_in_executor(
+                None, self.almacen.liberar, self.lote, self.instancia, list(self.sin_registrar)
+            )
+        except Exception as e:
+            self.senales.log.emit(f"⚠️ No se pudieron liberar los arriendos: {str(e)}")
+            return
+        self.fichas.clear()
+        if liberadas:
+            self.senales.log.emit(f"↩️ {liberadas} guía(s) devueltas al lote para otras instancias")
 
     def cancelar(self):
         """Cancela el proceso"""
         self.cancelado = True
         self.procesando = False
 
+    @staticmethod
+    def _loop_compatible():
+        """Loop asyncio en ejecución en este hilo (qasync) capaz de lanzar el driver de Playwright"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+        # En Windows los subprocesos solo funcionan sobre un loop proactor
+        if sys.platform == "win32" and not isinstance(loop, asyncio.ProactorEventLoop):
+            return None
+        return loop
+
+    def iniciar(self, en_loop=MOTOR_EN_LOOP_UI):
+        """Arranca el proceso en el loop de la interfaz si es posible (las señales se
+        entregan como llamadas directas); si no, en el QThread. Devuelve True en el primer caso."""
+        loop = self._loop_compatible() if en_loop else None
+        if loop is None:
+            self.start()
+            return False
+        self.tarea = loop.create_task(self.proceso_principal())
+        return True
+
     def run(self):
         """Ejecuta el thread"""
         loop = asyncio.new_event_loop()
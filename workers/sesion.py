@@ -0,0 +1,58 @@
+# workers/sesion.py
+"""
+Caché en memoria del estado de sesión autenticado (storage_state) por usuario
+"""
+import threading
+import time
+from typing import Optional
+
+from config.settings import DURACION_SESION
+
+
+class CacheSesion:
+    """Snapshots de storage_state por clave (usuario o usuario y trabajador).
+
+    Solo se guardan en memoria, nunca en disco: son locales a cada proceso (los procesos
+    hijos, lanzados con spawn, empiezan con la caché vacía)."""
+
+    _estados = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def obtener(cls, usuario: str) -> Optional[dict]:
+        """Devuelve el snapshot vigente del usuario o None si no existe o caducó"""
+        with cls._lock:
+            entrada = cls._estados.get(usuario)
+            if entrada is None:
+                return None
+            estado, marca = entrada
+            if time.monotonic() - marca > DURACION_SESION:
+                del cls._estados[usuario]
+                return None
+            return estado
+
+    @classmethod
+    def guardar(cls, usuario: str, estado: dict):
+        with cls._lock:
+            cls._estados[usuario] = (estado, time.monotonic())
+
+    @classmethod
+    def renovar(cls, usuario: str):
+        """Marca el snapshot como recién validado"""
+        with cls._lock:
+            entrada = cls._estados.get(usuario)
+            if entrada is not None:
+                cls._estados[usuario] = (entrada[0], time.monotonic())
+
+    @classmethod
+    def invalidar(cls, usuario: str, estado: Optional[dict] = None):
+        """Descarta el snapshot (solo si sigue siendo `estado`, cuando se indica)"""
+        with cls._lock:
+            entrada = cls._estados.get(usuario)
+            if entrada is not None and (estado is None or entrada[0] is estado):
+                del cls._estados[usuario]
+
+    @classmethod
+    def limpiar(cls):
+        with cls._lock:
+            cls._estados.clear()
@@ -0,0 +1,101 @@
+# workers/tiempos.py
+"""
+Medición de tiempos por paso del proceso (spans por trabajador agregados en histogramas)
+"""
+import time
+from contextlib import contextmanager
+
+# Pasos en el orden del ciclo de una guía: (clave, etiqueta)
+PASOS = [
+    ("navegador", "Lanzar navegador"),
+    ("login", "Login / sesión"),
+    ("navegacion", "Navegar a 7.8"),
+    ("busqueda", "Buscar guía"),
+    ("ent", "Verificar ENT"),
+    ("abrir_guia", "Abrir guía"),
+    ("codigos", "Ingresar códigos"),
+    ("creacion", "Crear incidencia"),
+    ("verificacion", "Verificar creación"),
+    ("volver", "Volver"),
+    ("busqueda_http", "Buscar guía (petición)"),
+    ("creacion_http", "Crear incidencia (petición)"),
+]
+
+# Límites superiores (s) de los intervalos del histograma; el último es abierto
+LIMITES_HISTOGRAMA = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _percentil(ordenados, p):
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def _estadisticas(duraciones):
+    ordenados = sorted(duraciones)
+    histograma = [0] * (len(LIMITES_HISTOGRAMA) + 1)
+    for duracion in ordenados:
+        indice = next((i for i, limite in enumerate(LIMITES_HISTOGRAMA) if duracion <= limite),
+                      len(LIMITES_HISTOGRAMA))
+        histograma[indice] += 1
+    return {
+        "n": len(ordenados),
+        "p50": round(_percentil(ordenados, 50), 3),
+        "p95": round(_percentil(ordenados, 95), 3),
+        "max": round(ordenados[-1], 3),
+        "media": round(sum(ordenados) / len(ordenados), 3),
+        "histograma": histograma,
+    }
+
+
+class RegistroTiempos:
+    """Acumula spans (paso, navegador, duración) de un proceso; un único event loop, sin lock"""
+
+    def __init__(self):
+        self.origen = time.monotonic()
+        self.muestras = []  # (paso, nav_idx, inicio relativo, duración, error)
+
+    @contextmanager
+    def medir(self, paso, nav_idx):
+        """Mide el bloque como un span del paso `paso` del navegador `nav_idx`"""
+        inicio = time.monotonic()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.muestras.append(
+                (paso, nav_idx, inicio - self.origen, time.monotonic() - inicio, error)
+            )
+
+    def _agrupar(self, muestras):
+        por_paso = {}
+        for paso, _, _, duracion, _ in muestras:
+            por_paso.setdefault(paso, []).append(duracion)
+        return por_paso
+
+    def resumen_pasos(self):
+        """p50/p95/max por paso, en el orden de PASOS (solo los pasos medidos)"""
+        por_paso = self._agrupar(self.muestras)
+        resumen = []
+        for paso, etiqueta in PASOS:
+            if paso in por_paso:
+                resumen.append({"paso": paso, "etiqueta": etiqueta, **_estadisticas(por_paso[paso])})
+        return resumen
+
+    def resumen(self):
+        """Resumen completo para el archivo de tiempos: global y por navegador"""
+        navegadores = sorted({nav_idx for _, nav_idx, _, _, _ in self.muestras})
+        return {
+            "limites_histograma": list(LIMITES_HISTOGRAMA),
+            "pasos": self.resumen_pasos(),
+            "por_navegador": {
+                f"Nav{nav_idx}": {
+                    paso: _estadisticas(duraciones)
+                    for paso, duraciones in self._agrupar(
+                        [m for m in self.muestras if m[1] == nav_idx]
+                    ).items()
+                }
+                for nav_idx in navegadores
+            },
+        }
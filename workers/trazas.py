@@ -0,0 +1,74 @@
+# workers/trazas.py
+"""
+Captura selectiva de trazas de Playwright: un chunk por guía que solo se guarda
+si la guía falló o superó el umbral de latencia
+"""
+import re
+from datetime import datetime
+from pathlib import Path
+
+from config.settings import RUTA_TRAZAS, MAX_MB_TRAZAS
+
+
+class CapturaTrazas:
+    """Mantiene el tracing abierto en cada contexto y descarta los chunks de guías normales"""
+
+    def __init__(self, carpeta=RUTA_TRAZAS, limite_mb=MAX_MB_TRAZAS):
+        self.carpeta = Path(carpeta)
+        self.limite = limite_mb * 1024 * 1024
+        self.bytes_escritos = 0
+        self.guardadas = 0
+        self.lleno = False
+        self.activos = set()  # contextos con tracing iniciado
+
+    async def iniciar(self, context):
+        """Activa el tracing del contexto (capturas y snapshots del DOM)"""
+        try:
+            await context.tracing.start(screenshots=True, snapshots=True)
+            self.activos.add(context)
+        except Exception:
+            pass
+
+    async def inicio_guia(self, context, guia):
+        if context not in self.activos:
+            return
+        try:
+            await context.tracing.start_chunk(title=guia)
+        except Exception:
+            self.activos.discard(context)
+
+    async def fin_guia(self, context, guia, nav_idx, motivo=None):
+        """Cierra el chunk de la guía; lo escribe solo si hay `motivo` y queda cupo.
+        Devuelve la ruta guardada o None."""
+        if context not in self.activos:
+            return None
+        if not motivo or self.lleno:
+            try:
+                await context.tracing.stop_chunk()
+            except Exception:
+                self.activos.discard(context)
+            return None
+
+        self.carpeta.mkdir(parents=True, exist_ok=True)
+        marca = datetime.now().strftime("%Y%m%d_%H%M%S")
+        nombre = re.sub(r"[^\w.-]", "_", f"{marca}_Nav{nav_idx}_{guia}_{motivo}")
+        ruta = self.carpeta / f"{nombre}.zip"
+        try:
+            await context.tracing.stop_chunk(path=str(ruta))
+        except Exception:
+            self.activos.discard(context)
+            return None
+
+        tamano = ruta.stat().st_size if ruta.exists() else 0
+        if self.bytes_escritos + tamano > self.limite:
+            # El tope es estricto: la traza que lo supera se elimina y no se guardan más
+            ruta.unlink(missing_ok=True)
+            self.lleno = True
+            return None
+        self.bytes_escritos += tamano
+        self.guardadas += 1
+        return ruta
+
+    def olvidar(self, context):
+        """El contexto se cerró (recuperación o retiro del trabajador)"""
+        self.activos.discard(context)